@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of ip2geotools, kept out of the test suite as their results
+depend on the machine. Every module provides function ``run`` printing its
+results; run them by ``python -m benchmarks [NAME ...]`` from the root of
+the repository.
+
+"""
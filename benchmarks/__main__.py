@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Runs benchmarks of given names (all of them by default) and prints their
+results::
+
+    python -m benchmarks [NAME ...]
+
+"""
+import importlib
+import pkgutil
+import sys
+
+import benchmarks
+
+
+def main(names):
+    if not names:
+        names = sorted(name for _, name, _ in pkgutil.iter_modules(benchmarks.__path__)
+                       if not name.startswith('_'))
+
+    for name in names:
+        importlib.import_module('benchmarks.' + name).run()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
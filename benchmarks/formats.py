@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Serialization time per location by serializers of output data formats
+(JSON by :py:mod:`orjson` when it is installed and by :py:mod:`json`).
+
+"""
+import io
+import timeit
+
+from ip2geotools import formats
+from ip2geotools.models import IpLocation
+
+#: Number of serialized locations.
+LOCATIONS = 10000
+
+
+def run():
+    locations = [IpLocation('147.229.2.90', 'Brno', 'Jihomoravský kraj', 'CZ', 49.195, 16.608),
+                 IpLocation('8.8.8.8', 'Mountain View', 'California', 'US', 37.386, -122.0838)]
+    locations = [locations[i % 2] for i in range(LOCATIONS)]
+    timings = []
+
+    def measure(name, function):
+        elapsed = min(timeit.repeat(function, number=1, repeat=3))
+        timings.append('%s %.2f us' % (name, elapsed / LOCATIONS * 1e6))
+
+    orjson = formats._get_orjson()  # pylint: disable=protected-access
+
+    if orjson is not None:
+        measure('orjson', lambda: formats.write_json_lines(locations, io.StringIO()))
+
+    formats._orjson = None  # pylint: disable=protected-access
+
+    try:
+        measure('json', lambda: formats.write_json_lines(locations, io.StringIO()))
+    finally:
+        formats._orjson = orjson  # pylint: disable=protected-access
+
+    measure('xml', lambda: formats.write_xml(locations, io.StringIO()))
+    measure('csv', lambda: formats.write_csv(locations, io.StringIO()))
+    measure('to_tuple', lambda: [location.to_tuple() for location in locations])
+
+    print('formats: serialization per location: ' + ', '.join(timings))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Latency of lookups in GeoLite2 database by reader reused from registry of
+handles compared to reader opened for every lookup (requires ``geoip2``
+and ``mmdb_writer``).
+
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from tests.fixtures import write_maxmind_database
+
+#: Number of measured lookups.
+LOOKUPS = 2000
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def latencies(function, ip_addresses):
+    """
+    Return latencies of calls of given function with every IP address.
+
+    """
+
+    result = []
+
+    for ip_address in ip_addresses:
+        start = time.perf_counter()
+        function(ip_address)
+        result.append(time.perf_counter() - start)
+
+    return result
+
+
+def run():
+    import geoip2.database
+    from ip2geotools.databases.noncommercial import MaxMindGeoLite2City
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        db_path = os.path.join(directory, 'GeoLite2-City.mmdb')
+        write_maxmind_database(db_path)
+
+        def reader_per_lookup(ip_address):
+            # lookup as done before readers were registered
+            reader = geoip2.database.Reader(db_path)
+
+            try:
+                return reader.city(ip_address)
+            finally:
+                reader.close()
+
+        ip_addresses = ['147.229.%d.%d' % (i // 256 % 256, i % 256) for i in range(LOOKUPS)]
+        reused = latencies(lambda ip_address: MaxMindGeoLite2City.get(ip_address, db_path=db_path),
+                           ip_addresses)
+        opened = latencies(reader_per_lookup, ip_addresses)
+
+        print('handles: lookup latency p50/p99: %.1f/%.1f us with reused reader, '
+              '%.1f/%.1f us with reader per lookup'
+              % (percentile(reused, 0.5) * 1e6, percentile(reused, 0.99) * 1e6,
+                 percentile(opened, 0.5) * 1e6, percentile(opened, 0.99) * 1e6))
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Cumulative import time of the command line interface and the library
+measured by ``python -X importtime`` in fresh interpreters.
+
+"""
+import subprocess
+import sys
+
+#: Imported modules.
+MODULES = ['ip2geotools.cli', 'ip2geotools.databases.noncommercial',
+           'ip2geotools.databases.commercial']
+
+#: Number of runs per module, the best of them is printed.
+RUNS = 5
+
+
+def import_time(module):
+    """
+    Return cumulative import time of given module in seconds.
+
+    """
+
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            universal_newlines=True,
+                            check=True).stderr
+
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+
+    raise RuntimeError('%s not found in output of -X importtime' % module)
+
+
+def run():
+    for module in MODULES:
+        elapsed = min(import_time(module) for _ in range(RUNS))
+
+        print('imports: %s imported in %.1f ms' % (module, elapsed * 1e3))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Memory allocated by locations with ``__slots__`` compared to locations with
+instance dictionaries and to columnar batch (set environment variable
+``IP2GEOTOOLS_BENCHMARK_ROWS`` to ``10000000`` for full-size run).
+
+"""
+import os
+import tracemalloc
+
+from ip2geotools.models import IpLocation, IpLocationBatch
+
+#: Number of measured locations.
+ROWS = int(os.environ.get('IP2GEOTOOLS_BENCHMARK_ROWS', 100000))
+
+CITIES = [('Brno', 'South Moravian', 'CZ', 49.195, 16.608),
+          ('Mountain View', 'California', 'US', 37.386, -122.0838),
+          ('Berlin', 'Berlin', 'DE', 52.52, 13.405)]
+
+
+class _DictLocation(object):
+    # location storing its attributes in instance dictionary, as IpLocation did before
+    def __init__(self, ip_address, city=None, region=None, country=None,
+                 latitude=None, longitude=None):
+        self.ip_address = ip_address
+        self.city = city
+        self.region = region
+        self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+def _ip_addresses(count):
+    # distinct IP addresses shared by all measured models
+    return ['10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255, i & 255) for i in range(count)]
+
+
+def allocated(factory):
+    """
+    Return number of bytes allocated by objects created by given function
+    (which are kept alive until they are measured).
+
+    """
+
+    tracemalloc.start()
+
+    try:
+        objects = factory()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    del objects
+
+    return size
+
+
+def run():
+    ip_addresses = _ip_addresses(ROWS)
+
+    def locations(model):
+        return lambda: [model(ip_address, *CITIES[i % 3]) for i, ip_address in enumerate(ip_addresses)]
+
+    slots = allocated(locations(IpLocation))
+    dicts = allocated(locations(_DictLocation))
+    batch = allocated(lambda: IpLocationBatch(locations(IpLocation)()))
+
+    print('models: memory per location of %d: %.1f B with __slots__, %.1f B with __dict__, %.1f B in batch'
+          % (ROWS, slots / ROWS, dicts / ROWS, batch / ROWS))
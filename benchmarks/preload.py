@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Private memory added by lookups in processes forked after range index of
+IP2Location database has been preloaded (packed) compared to processes
+forked after it has been only opened (requires ``fork`` and
+``/proc/self/smaps_rollup``).
+
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from tests.fixtures import write_ip2location_db5
+
+
+# forks children looking up random IP addresses in database given by argv[1],
+# preloaded (packed) in parent when argv[2] is 'preload', otherwise only opened
+# (compiled); prints private memory added by lookups in every child in kB
+CHILD_MEMORY_SCRIPT = '''
+import gc, os, random, socket, sys
+from ip2geotools.databases.noncommercial import LocalRangeIndex
+from ip2geotools.databases.handles import freeze
+
+def private():
+    with open('/proc/self/smaps_rollup') as f:
+        return sum(int(line.split()[1]) for line in f
+                   if line.startswith(('Private_Dirty', 'Private_Clean')))
+
+db_path, mode = sys.argv[1:3]
+gc.disable()
+
+if mode == 'preload':
+    LocalRangeIndex.preload(db_path)
+else:
+    LocalRangeIndex.indexes.get(db_path)
+
+generator = random.Random(0)
+ip_addresses = [socket.inet_ntoa(generator.getrandbits(32).to_bytes(4, 'big'))
+                for _ in range(50000)]
+freeze()
+
+for _ in range(2):
+    read, write = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        gc.enable()
+        start = private()
+
+        for ip_location in LocalRangeIndex.get_many(ip_addresses, db_path=db_path):
+            pass
+
+        gc.collect()
+        os.write(write, str(private() - start).encode())
+        os._exit(0)
+
+    os.close(write)
+    print(int(os.read(read, 100)))
+    os.waitpid(pid, 0)
+'''
+
+
+def child_memory(db_path, mode):
+    """
+    Return private memory (in kB) added by lookups in each of forked
+    processes sharing database opened in given mode.
+
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', CHILD_MEMORY_SCRIPT, db_path, mode],
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True,
+                            check=True,
+                            cwd=root).stdout
+
+    return [int(line) for line in output.split()]
+
+
+def run():
+    directory = tempfile.mkdtemp()
+
+    try:
+        db_path = os.path.join(directory, 'IP2LOCATION-DB5.BIN')
+        generator = random.Random(0)
+        starts = sorted(set(generator.getrandbits(32) for _ in range(100000)) - {0})
+        write_ip2location_db5(db_path,
+                              [(0, '-', '-', '-', 0.0, 0.0)] +
+                              [(start, 'C%d' % (i % 200), 'Region %d' % (i % 3000),
+                                'City %d' % (i % 20000), generator.uniform(-90, 90),
+                                generator.uniform(-180, 180))
+                               for i, start in enumerate(starts)])
+
+        print('preload: private memory per child: %s kB preloaded, %s kB opened'
+              % (child_memory(db_path, 'preload'), child_memory(db_path, 'open')))
+    finally:
+        shutil.rmtree(directory)
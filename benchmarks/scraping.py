@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Parse of result page of DbIpWeb by :py:func:`ip2geotools.databases.scraping.parse_table`
+compared to selector query per field (requires ``pyquery``).
+
+"""
+import timeit
+
+from tests.test_scraping import parse_with_selectors, parse_with_table, read_html
+
+#: Number of measured parses.
+NUMBER = 200
+
+
+def run():
+    content = read_html('dbipweb.html')
+    selectors = min(timeit.repeat(lambda: parse_with_selectors(content), number=NUMBER, repeat=3))
+    table = min(timeit.repeat(lambda: parse_with_table(content), number=NUMBER, repeat=3))
+
+    print('scraping: parse of result page: %.3f ms by selectors, %.3f ms by parse_table'
+          % (selectors / NUMBER * 1e3, table / NUMBER * 1e3))
@@ -12,29 +12,55 @@ handle running basic functions of `ip2geotools` from command line interface.
 from __future__ import print_function
 import argparse
 import codecs
+import collections
+import itertools
 import os
 import sys
-import json
-import dicttoxml
 
 import ip2geotools
-from ip2geotools.databases.noncommercial import DbIpCity, \
-                                                HostIP, \
-                                                Freegeoip, \
-                                                Ipstack, \
-                                                MaxMindGeoLite2City, \
-                                                Ip2Location
-from ip2geotools.databases.commercial import DbIpWeb, \
-                                             MaxMindGeoIp2City, \
-                                             Ip2LocationWeb, \
-                                             NeustarWeb, \
-                                             GeobytesCityDetails, \
-                                             SkyhookContextAcceleratorIp, \
-                                             IpInfo, \
-                                             Eurek, \
-                                             Ipdata
-from ip2geotools.models import IpLocation
-from ip2geotools.errors import LocationError
+from ip2geotools.databases import get_database
+from ip2geotools.errors import LocationError, ServiceError
+
+
+# databases read from local files, looked up in worker processes
+LOCAL_DATABASES = {'maxmindgeolite2city', 'ip2location', 'localrangeindex'}
+
+# databases queried by ``-d all``: online databases usable without API key or account
+# (``freegeoip`` is deprecated, ``ip2locationweb`` needs running Firefox)
+KEYLESS_DATABASES = [
+    'dbipcity',
+    'hostip',
+    'dbipweb',
+    'neustarweb',
+    'geobytescitydetails',
+    'ipinfo',
+]
+
+# delimiters of CSV output data formats
+CSV_DELIMITERS = {'csv-space': ' ', 'csv-tab': '\t'}
+
+# databases selectable from command line
+DATABASE_CHOICES = [
+    # noncommercial
+    'dbipcity',
+    'hostip',
+    'freegeoip',
+    'ipstack',
+    'maxmindgeolite2city',
+    'ip2location',
+    'localrangeindex',
+
+    # commercial
+    'dbipweb',
+    'maxmindgeoip2city',
+    'ip2locationweb',
+    'neustarweb',
+    'geobytescitydetails',
+    'skyhookcontextacceleratorip',
+    'ipinfo',
+    'eurek',
+    'ipdata',
+]
 
 
 class Command(object):
@@ -54,6 +80,10 @@ class Command(object):
 
         """
 
+        if self.argv[1:2] == ['compile']:
+            self.compile()
+            return
+
         # args parser
         parser = argparse.ArgumentParser(
             prog=self.prog_name,
@@ -62,6 +92,13 @@ class Command(object):
             epilog=('\n\nexample:' + \
                    '\n  get information on 147.229.2.90 from DB-IP API in JSON format' + \
                    '\n    {prog_name} 147.229.2.90 -d dbipcity -f json' + \
+                   '\n  get information on all IP addresses from access log in CSV format' + \
+                   '\n    {prog_name} -i access.log -d maxmindgeolite2city --db_path GeoLite2-City.mmdb -f csv-tab' + \
+                   '\n  get information on 147.229.2.90 from the fastest of two databases' + \
+                   '\n    {prog_name} 147.229.2.90 -d ipinfo,dbipcity --timeout 2' + \
+                   '\n  compile GeoLite2 database into snapshot of range index and use it' + \
+                   '\n    {prog_name} compile GeoLite2-City.mmdb GeoLite2-City.snapshot' + \
+                   '\n    {prog_name} -i access.log -d localrangeindex --db_path GeoLite2-City.snapshot' + \
                    '\n\nauthor:' + \
                    '\n  {prog_name} was written by {author} <{author_email}> / <tomas.caha1@vut.cz>' + \
                    ' at FEEC BUT').format(
@@ -72,35 +109,44 @@ class Command(object):
             add_help=True)
 
         parser.add_argument('IP_ADDRESS',
-                            help='IP address to be checked')
+                            help='IP address to be checked',
+                            nargs='?')
+
+        parser.add_argument('-i', '--input',
+                            help='file with IP addresses to be checked, one per line ' + \
+                                 '(first field of line), or - for standard input',
+                            metavar='FILE',
+                            dest='input')
 
         parser.add_argument('-d', '--database',
-                            help='geolocation database to be used (case insesitive)',
+                            help='geolocation database to be used (case insesitive): ' + \
+                                 'all (databases usable without API key), ' + \
+                                 'or one or more of {0} separated by commas '.format(
+                                     ', '.join(DATABASE_CHOICES)) + \
+                                 '(queried concurrently, see --strategy)',
+                            metavar='DATABASE',
                             dest='database',
                             required=True,
-                            type=str.lower,
-                            choices=[
-                                #'all',
-
-                                # noncommercial
-                                'dbipcity',
-                                'hostip',
-                                'freegeoip',
-                                'ipstack',
-                                'maxmindgeolite2city',
-                                'ip2location',
-
-                                # commercial
-                                'dbipweb',
-                                'maxmindgeoip2city',
-                                'ip2locationweb',
-                                'neustarweb',
-                                'geobytescitydetails',
-                                'skyhookcontextacceleratorip',
-                                'ipinfo',
-                                'eurek',
-                                'ipdata',
-                            ])
+                            type=database_names)
+
+        parser.add_argument('--strategy',
+                            help='how answers of many databases are combined: first location ' + \
+                                 '(default) or location agreed on by quorum of databases',
+                            dest='strategy',
+                            default='fastest',
+                            choices=['fastest', 'quorum'])
+
+        parser.add_argument('--quorum',
+                            help='number of databases which must agree on country and city ' + \
+                                 '(default: majority)',
+                            dest='quorum',
+                            type=int)
+
+        parser.add_argument('--timeout',
+                            help='number of seconds to wait for every database queried ' + \
+                                 'together with other databases (no limit by default)',
+                            dest='timeout',
+                            type=float)
 
         parser.add_argument('--api_key',
                             help='API key for given geolocation database (if needed)',
@@ -129,9 +175,52 @@ class Command(object):
                                 'xml',
                                 'csv-space',
                                 'csv-tab',
+                                'msgpack',
                                 'inline'
                             ])
 
+        parser.add_argument('--header',
+                            help='print header row with names of fields in CSV output data formats',
+                            dest='header',
+                            action='store_true')
+
+        parser.add_argument('-w', '--workers',
+                            help='number of parallel workers for IP addresses read from input ' + \
+                                 '(threads for online databases, processes for local database files)',
+                            dest='workers',
+                            type=int,
+                            default=1)
+
+        parser.add_argument('--ordered',
+                            help='print results in the same order as input IP addresses (default)',
+                            dest='ordered',
+                            action='store_true',
+                            default=True)
+
+        parser.add_argument('--unordered',
+                            help='print results as soon as they are available',
+                            dest='ordered',
+                            action='store_false')
+
+        parser.add_argument('--cache-size',
+                            help='number of locations cached in memory during run ' + \
+                                 '(disabled by default)',
+                            dest='cache_size',
+                            type=int,
+                            default=0)
+
+        parser.add_argument('--cache',
+                            help='path to file with persistent cache of locations ' + \
+                                 '(shared by all runs and processes)',
+                            metavar='PATH',
+                            dest='cache_path')
+
+        parser.add_argument('--cache-ttl',
+                            help='number of seconds for which locations are cached (default: 3600)',
+                            dest='cache_ttl',
+                            type=int,
+                            default=3600)
+
         parser.add_argument('-v', '--version',
                             action='version',
                             version='%(prog)s {0}'.format(ip2geotools.__version__))
@@ -139,81 +228,388 @@ class Command(object):
         # parse cli arguments
         arguments = parser.parse_args(self.argv[1:])
 
-        # process requests
-        ip_location = IpLocation('0.0.0.0')
+        if (arguments.IP_ADDRESS is None) == (arguments.input is None):
+            parser.error('exactly one of IP_ADDRESS and -i/--input is required')
 
-        try:
-            # noncommercial databases
-            if arguments.database == 'dbipcity':
-                if arguments.api_key:
-                    ip_location = DbIpCity.get(arguments.IP_ADDRESS,
-                                               api_key=arguments.api_key)
+        if arguments.workers < 1:
+            parser.error('number of workers must be positive')
+
+        if arguments.quorum is not None \
+           and not 1 <= arguments.quorum <= len(arguments.database.split(',')):
+            parser.error('quorum must be between 1 and number of databases')
+
+        if ',' in arguments.database:
+            # options of one database would be sent to all of them
+            if any(getattr(arguments, option) is not None
+                   for option in ('api_key', 'username', 'password')):
+                parser.error('--api_key, --username and --password cannot be used ' + \
+                             'with several databases')
+
+            if len(LOCAL_DATABASES.intersection(arguments.database.split(','))) > 1:
+                parser.error('at most one local database can be used with several databases')
+
+        # process requests
+        cache_options = {
+            'size': arguments.cache_size,
+            'path': arguments.cache_path,
+            'ttl': arguments.cache_ttl,
+        }
+        fanout_options = {
+            'strategy': arguments.strategy,
+            'quorum': arguments.quorum,
+            'timeout': arguments.timeout,
+        }
+        database = open_database(arguments.database, cache_options, fanout_options)
+        options = {
+            option: getattr(arguments, option)
+            for option in ('api_key', 'db_path', 'username', 'password')
+            if getattr(arguments, option) is not None
+        }
+
+        from ip2geotools.formats import write_json_lines, write_xml, write_csv, write_msgpack
+
+        if arguments.IP_ADDRESS is not None:
+            try:
+                result = database.get(arguments.IP_ADDRESS, **options)
+            except LocationError as e:
+                result = e
+
+            if arguments.format == 'msgpack':
+                write_msgpack([result], sys.stdout.buffer)
+            elif arguments.header and arguments.format in CSV_DELIMITERS:
+                write_csv([result], sys.stdout, CSV_DELIMITERS[arguments.format], header=True)
+            else:
+                print(format_result(result, arguments.format))
+        else:
+            if arguments.input == '-':
+                input_file = sys.stdin
+            else:
+                input_file = open(arguments.input, encoding='utf-8', errors='replace')
+
+            try:
+                if arguments.workers > 1:
+                    results = lookup_parallel(arguments.database,
+                                              read_ip_addresses(input_file),
+                                              options,
+                                              arguments.workers,
+                                              arguments.ordered,
+                                              cache_options,
+                                              fanout_options)
                 else:
-                    ip_location = DbIpCity.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'hostip':
-                ip_location = HostIP.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'freegeoip':
-                ip_location = Freegeoip.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'ipstack':
-                ip_location = Ipstack.get(arguments.IP_ADDRESS,
-                                          api_key=arguments.api_key)
-            elif arguments.database == 'maxmindgeolite2city':
-                ip_location = MaxMindGeoLite2City.get(arguments.IP_ADDRESS,
-                                                      db_path=arguments.db_path)
-            elif arguments.database == 'ip2location':
-                ip_location = Ip2Location.get(arguments.IP_ADDRESS,
-                                              db_path=arguments.db_path)
-
-            # commercial databases
-            elif arguments.database == 'dbipweb':
-                ip_location = DbIpWeb.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'maxmindgeoip2city':
-                ip_location = MaxMindGeoIp2City.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'ip2locationweb':
-                ip_location = Ip2LocationWeb.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'neustarweb':
-                ip_location = NeustarWeb.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'geobytescitydetails':
-                ip_location = GeobytesCityDetails.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'skyhookcontextacceleratorip':
-                ip_location = SkyhookContextAcceleratorIp.get(arguments.IP_ADDRESS,
-                                                              username=arguments.username,
-                                                              password=arguments.password)
-            elif arguments.database == 'ipinfo':
-                ip_location = IpInfo.get(arguments.IP_ADDRESS)
-            elif arguments.database == 'eurek':
-                ip_location = Eurek.get(arguments.IP_ADDRESS,
-                                        api_key=arguments.api_key)
-            elif arguments.database == 'ipdata':
-                if arguments.api_key:
-                    ip_location = Ipdata.get(arguments.IP_ADDRESS,
-                                               api_key=arguments.api_key)
+                    results = lookup(database, read_ip_addresses(input_file), options)
+
+                if arguments.format == 'json':
+                    write_json_lines(results, sys.stdout)
+                elif arguments.format == 'xml':
+                    write_xml(results, sys.stdout)
+                elif arguments.format == 'msgpack':
+                    write_msgpack(results, sys.stdout.buffer)
+                elif arguments.format in CSV_DELIMITERS:
+                    write_csv(results, sys.stdout, CSV_DELIMITERS[arguments.format], arguments.header)
                 else:
-                    ip_location = Ipdata.get(arguments.IP_ADDRESS)
-
-            # print formatted output
-            if arguments.format == 'json':
-                print(ip_location.to_json())
-            elif arguments.format == 'xml':
-                print(ip_location.to_xml())
-            elif arguments.format == 'csv-space':
-                print(ip_location.to_csv(' '))
-            elif arguments.format == 'csv-tab':
-                print(ip_location.to_csv('\t'))
-            elif arguments.format == 'inline':
-                print(ip_location)
-        except LocationError as e:
-            # print formatted output
-            if arguments.format == 'json':
-                print(e.to_json())
-            elif arguments.format == 'xml':
-                print(e.to_xml())
-            elif arguments.format == 'csv-space':
-                print(e.to_csv(' '))
-            elif arguments.format == 'csv-tab':
-                print(e.to_csv('\t'))
-            elif arguments.format == 'inline':
-                print('%s: %s' % (type(e).__name__, e.__str__()))
+                    for result in results:
+                        print(format_result(result, arguments.format, single_line=True))
+            finally:
+                if input_file is not sys.stdin:
+                    input_file.close()
+
+    def compile(self):
+        """
+        Compile database file into snapshot file of range index
+        (``ip2geotools compile SOURCE SNAPSHOT``).
+
+        """
+
+        from ip2geotools.databases.ranges import RangeIndex
+
+        parser = argparse.ArgumentParser(
+            prog='{0} compile'.format(self.prog_name),
+            description='compile GeoLite2 (.mmdb) or IP2Location (.BIN) database file into ' + \
+                        'snapshot file loaded by localrangeindex database without parsing')
+
+        parser.add_argument('SOURCE',
+                            help='path to GeoLite2 or IP2Location database file')
+
+        parser.add_argument('SNAPSHOT',
+                            help='path to snapshot file to be written')
+
+        arguments = parser.parse_args(self.argv[2:])
+
+        try:
+            index = RangeIndex.open(arguments.SOURCE)
+            index.save(arguments.SNAPSHOT)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+        print('{0}: {1} IPv4 ranges, {2} IPv6 ranges, {3} locations'.format(
+            arguments.SNAPSHOT,
+            len(index.starts4),
+            len(index.starts6_high),
+            len(index.locations)))
+
+
+def read_ip_addresses(lines):
+    """
+    Yield IP address from every non-empty line of given lines. IP address is
+    expected to be the first field of line (as in web server access logs).
+
+    """
+
+    for line in lines:
+        fields = line.split(None, 1)
+
+        if fields:
+            yield fields[0]
+
+
+def database_names(value):
+    """
+    Return names of databases given on command line (single name, names
+    separated by commas or ``all`` standing for all databases usable without
+    API key or account) normalized as names separated by commas.
+
+    """
+
+    names = [name.strip() for name in value.lower().split(',')]
+
+    if names == ['all']:
+        return ','.join(KEYLESS_DATABASES)
+
+    for name in names:
+        if name not in DATABASE_CHOICES:
+            raise argparse.ArgumentTypeError('invalid choice: %r (choose all or from %s)'
+                                              % (name, ', '.join(DATABASE_CHOICES)))
+
+    return ','.join(names)
+
+
+_databases = {}
+
+
+def open_database(database_name, cache_options=None, fanout_options=None):
+    """
+    Return database registered under given name, or database querying all
+    databases of given names separated by commas combined by fan-out options
+    (see :py:class:`ip2geotools.databases.fanout.FanOutDatabase`), wrapped in
+    cache when enabled by cache options. The same database is returned for
+    the same arguments within one process.
+
+    """
+
+    from ip2geotools.databases.cache import CachedDatabase, MemoryCache, SqliteCache
+    from ip2geotools.databases.fanout import FanOutDatabase
+    from ip2geotools.databases.geocoding import CityLocator
+
+    cache_options = cache_options or {}
+    fanout_options = fanout_options or {}
+    key = (database_name,
+           tuple(sorted(cache_options.items())),
+           tuple(sorted(fanout_options.items())))
+    database = _databases.get(key)
+
+    if database is None:
+        if ',' in database_name:
+            database = FanOutDatabase([get_database(name) for name in database_name.split(',')],
+                                      **fanout_options)
+        else:
+            database = get_database(database_name)
+
+        if cache_options.get('path'):
+            # persist also coordinates of cities resolved by database (in subclass,
+            # so that locator of the database itself is kept intact)
+            locator = getattr(database, 'locator', None)
+
+            if isinstance(locator, CityLocator):
+                database = type(database.__name__, (database,), {
+                    'locator': CityLocator(SqliteCache(cache_options['path']),
+                                           ttl=locator.ttl,
+                                           gazetteer=locator.gazetteer,
+                                           online=locator.online),
+                })
+
+            database = CachedDatabase(database,
+                                      SqliteCache(cache_options['path']),
+                                      ttl=cache_options.get('ttl', 3600))
+
+        if cache_options.get('size'):
+            database = CachedDatabase(database,
+                                      MemoryCache(cache_options['size']),
+                                      ttl=cache_options.get('ttl', 3600))
+
+        database = _databases.setdefault(key, database)
+
+    return database
+
+
+def lookup(database, ip_addresses, options):
+    """
+    Yield locations of given IP addresses (or location errors) looked up by
+    ``get_many`` of given database. IP address is set to every location
+    error, so that it can be matched to its input.
+
+    """
+
+    read = collections.deque()
+
+    def record(ip_addresses):
+        for ip_address in ip_addresses:
+            read.append(ip_address)
+            yield ip_address
+
+    for result in database.get_many(record(ip_addresses), **options):
+        ip_address = read.popleft()
+
+        if isinstance(result, LocationError) and result.ip_address is None:
+            result.ip_address = ip_address
+
+        yield result
+
+
+def _lookup_chunk(database_name, ip_addresses, options, cache_options, fanout_options):
+    database = open_database(database_name, cache_options, fanout_options)
+
+    return list(lookup(database, ip_addresses, options))
+
+
+def _chunk_results(future, ip_addresses):
+    # results of chunk of IP addresses, errors of all of them when its worker failed
+    try:
+        return future.result()
+    except ImportError:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        results = []
+
+        for ip_address in ip_addresses:
+            error = ServiceError(str(e))
+            error.ip_address = ip_address
+            results.append(error)
+
+        return results
+
+
+def _fork_context():
+    # workers have to be forked to share preloaded databases, which is not
+    # the default start method everywhere (e.g. on Linux since Python 3.14)
+    import multiprocessing
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return {}
+
+    if sys.version_info < (3, 7):
+        # start method of pool cannot be chosen, fork is the default on POSIX
+        return {}
+
+    return {'mp_context': multiprocessing.get_context('fork')}
+
+
+def lookup_parallel(database_name, ip_addresses, options, workers, ordered=True,
+                    cache_options=None, fanout_options=None):
+    """
+    Yield locations of given IP addresses (or location errors) looked up by
+    given number of workers. Online databases are accessed from a pool of
+    threads, local database files are loaded in advance and read from a pool
+    of forked processes in chunks of IP addresses. Results are yielded in the order
+    of IP addresses when ordered, otherwise as soon as they are available.
+    All IP addresses of chunk whose worker failed get :py:exc:`ServiceError`.
+
+    """
+
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+    from ip2geotools.databases.handles import freeze
+    from ip2geotools.databases.sessions import POOL_MAXSIZE, set_pool_maxsize
+
+    if database_name in LOCAL_DATABASES:
+        # forked workers share database file loaded in advance
+        try:
+            open_database(database_name, cache_options, fanout_options).preload(
+                options.get('db_path'))
+        except:
+            pass  # reported by workers for every IP address
+
+        freeze()
+        executor = ProcessPoolExecutor(workers, **_fork_context())
+        chunk_size = 1024
+    else:
+        # every thread keeps its own connection alive
+        set_pool_maxsize(max(workers, POOL_MAXSIZE))
+        executor = ThreadPoolExecutor(workers)
+        chunk_size = 1
+
+    ip_addresses = iter(ip_addresses)
+    pending = collections.deque()
+    chunks = {}
+
+    with executor:
+        while True:
+            # keep every worker busy without reading whole input at once
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(ip_addresses, chunk_size))
+
+                if not chunk:
+                    break
+
+                future = executor.submit(_lookup_chunk,
+                                         database_name,
+                                         chunk,
+                                         options,
+                                         cache_options,
+                                         fanout_options)
+                chunks[future] = chunk
+                pending.append(future)
+
+            if not pending:
+                break
+
+            if ordered:
+                future = pending.popleft()
+            else:
+                future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                pending.remove(future)
+
+            for result in _chunk_results(future, chunks.pop(future)):
+                yield result
+
+
+def format_result(result, data_format, single_line=False):
+    """
+    Format location of IP address or location error in given output data
+    format. Location in inline format takes one line per field unless
+    ``single_line`` is set (bulk output), in which case fields are separated
+    by commas; location error is preceded by its IP address when it is set
+    (bulk output).
+
+    """
+
+    if isinstance(result, LocationError):
+        if data_format == 'json':
+            return result.to_json()
+        elif data_format == 'xml':
+            return result.to_xml()
+        elif data_format in CSV_DELIMITERS:
+            return result.to_csv(CSV_DELIMITERS[data_format])
+
+        if result.ip_address is None:
+            return '%s: %s' % (type(result).__name__, result.__str__())
+
+        message = type(result).__name__
+
+        if result.__str__() and result.__str__() != result.ip_address:
+            message = '%s: %s' % (message, result.__str__())
+
+        return '%s, %s' % (result.ip_address, message)
+
+    if data_format == 'json':
+        return result.to_json()
+    elif data_format == 'xml':
+        return result.to_xml()
+    elif data_format in CSV_DELIMITERS:
+        return result.to_csv(CSV_DELIMITERS[data_format])
+
+    if single_line:
+        return ', '.join(result.__str__().splitlines())
+
+    return result.__str__()
 
 
 def execute_from_command_line(argv=None):
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Databases
+=========
+
+Registry of all supported geolocation databases. Database classes and their
+(often heavy) dependencies are imported only when they are first used.
+
+"""
+import importlib
+
+
+DATABASES = {
+    # noncommercial
+    'dbipcity': 'ip2geotools.databases.noncommercial.DbIpCity',
+    'hostip': 'ip2geotools.databases.noncommercial.HostIP',
+    'freegeoip': 'ip2geotools.databases.noncommercial.Freegeoip',
+    'ipstack': 'ip2geotools.databases.noncommercial.Ipstack',
+    'maxmindgeolite2city': 'ip2geotools.databases.noncommercial.MaxMindGeoLite2City',
+    'ip2location': 'ip2geotools.databases.noncommercial.Ip2Location',
+    'localrangeindex': 'ip2geotools.databases.noncommercial.LocalRangeIndex',
+
+    # commercial
+    'dbipweb': 'ip2geotools.databases.commercial.DbIpWeb',
+    'maxmindgeoip2city': 'ip2geotools.databases.commercial.MaxMindGeoIp2City',
+    'ip2locationweb': 'ip2geotools.databases.commercial.Ip2LocationWeb',
+    'neustarweb': 'ip2geotools.databases.commercial.NeustarWeb',
+    'geobytescitydetails': 'ip2geotools.databases.commercial.GeobytesCityDetails',
+    'skyhookcontextacceleratorip': 'ip2geotools.databases.commercial.SkyhookContextAcceleratorIp',
+    'ipinfo': 'ip2geotools.databases.commercial.IpInfo',
+    'eurek': 'ip2geotools.databases.commercial.Eurek',
+    'ipdata': 'ip2geotools.databases.commercial.Ipdata',
+}
+
+
+def get_database(name):
+    """
+    Return class of geolocation database registered under given name
+    (case insensitive).
+
+    """
+
+    module_name, class_name = DATABASES[name.lower()].rsplit('.', 1)
+
+    return getattr(importlib.import_module(module_name), class_name)
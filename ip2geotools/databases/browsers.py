@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Browsers
+========
+
+This module provides a pool of running web browsers (selenium WebDriver
+sessions) for geolocation databases which have to be accessed by a real
+browser, so that a browser is not started again for every IP address.
+
+"""
+import atexit
+import contextlib
+import threading
+
+
+class BrowserPool(object):
+    """
+    Bounded pool of browsers created by ``factory``.
+
+    At most ``size`` browsers exist at once; further requests wait until one
+    is returned to the pool. A browser is quit and replaced after
+    ``max_uses`` uses or when an exception for which ``discard`` returns true
+    (by default any exception) is raised while it is used, e.g. when the
+    browser itself failed. All browsers, including browsers still in use, are
+    quit when the pool is closed or the interpreter exits.
+
+    """
+
+    def __init__(self, factory, size=2, max_uses=50, discard=None):
+        self.factory = factory
+        self.max_uses = max_uses
+        self.discard = discard or (lambda exception: True)
+        self._idle = []
+        self._busy = set()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        atexit.register(self.close)
+
+    @contextlib.contextmanager
+    def browser(self):
+        """
+        Context manager checking out a browser from the pool and returning it
+        back afterwards.
+
+        """
+
+        with self._slots:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+
+            if entry is None:
+                entry = [self.factory(), 0]
+
+            with self._lock:
+                self._busy.add(entry[0])
+
+            broken = False
+
+            try:
+                yield entry[0]
+            except BaseException as e:
+                broken = self.discard(e)
+                raise
+            finally:
+                entry[1] += 1
+
+                with self._lock:
+                    # browser is no longer busy when it was quit by close()
+                    already_quit = entry[0] not in self._busy
+                    self._busy.discard(entry[0])
+                    keep = not (already_quit or broken or self._closed or entry[1] >= self.max_uses)
+
+                    if keep:
+                        self._idle.append(entry)
+
+                if not keep and not already_quit:
+                    self._quit(entry[0])
+
+    def close(self):
+        """
+        Quit all browsers, idle ones as well as ones in use (these are not
+        returned back to the pool). Browsers checked out afterwards are quit
+        after every use.
+
+        """
+
+        with self._lock:
+            self._closed = True
+            browsers = [entry[0] for entry in self._idle] + list(self._busy)
+            self._idle = []
+            self._busy = set()
+
+        for browser in browsers:
+            self._quit(browser)
+
+    @staticmethod
+    def _quit(browser):
+        try:
+            browser.quit()
+        except:
+            pass
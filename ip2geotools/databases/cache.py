@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+Cache
+=====
+
+These classes provide caching of locations returned by geolocation databases,
+so that repeated lookups of the same IP address do not access the database
+(and do not consume its query limits) again.
+
+"""
+import collections
+import copy
+import hashlib
+import ipaddress
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ip2geotools.databases.interfaces import IGeoIpDatabase, lookup_batch, alookup_many
+from ip2geotools.models import IpLocation
+from ip2geotools import errors
+from ip2geotools.errors import LocationError, IpAddressNotFoundError
+
+#: Number of IP addresses looked up in cache at once by ``get_many`` of
+#: :py:class:`CachedDatabase` before the missing ones are passed to database.
+GET_MANY_CHUNK = 1024
+
+
+class MemoryCache(object):
+    """
+    In-process cache with least recently used eviction and per-entry
+    expiration. Entries are stored under keys ``(provider, ip_address)``.
+
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return value stored under given key or raise :py:exc:`KeyError` when
+        there is no such value or it has expired.
+
+        """
+
+        with self._lock:
+            expires, value = self._entries[key]
+
+            if expires < time.monotonic():
+                del self._entries[key]
+                raise KeyError(key)
+
+            self._entries.move_to_end(key)
+
+        return value
+
+    def set(self, key, value, ttl):
+        """
+        Store value under given key for given number of seconds.
+
+        """
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries.
+
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCache(object):
+    """
+    Persistent cache stored in SQLite database file, which can be shared by
+    many threads and processes at once. Values are locations
+    (:py:class:`ip2geotools.models.IpLocation`), location errors or other
+    JSON serializable values stored under keys ``(provider, ip_address)``.
+
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS locations ('
+                               'provider TEXT NOT NULL, '
+                               'ip_address TEXT NOT NULL, '
+                               'expires REAL NOT NULL, '
+                               'value TEXT NOT NULL, '
+                               'PRIMARY KEY (provider, ip_address)) WITHOUT ROWID')
+
+    def _connection(self):
+        # connections must not be shared by threads nor inherited by forked processes
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    @staticmethod
+    def _dumps(value):
+        if isinstance(value, LocationError):
+            return json.dumps({'error_type': type(value).__name__,
+                               'error_args': list(value.args)})
+        elif isinstance(value, IpLocation):
+            return value.to_json()
+
+        return json.dumps({'value': value})
+
+    @staticmethod
+    def _loads(value):
+        value = json.loads(value)
+
+        if 'error_type' in value:
+            return getattr(errors, value['error_type'], LocationError)(*value['error_args'])
+        elif 'value' in value:
+            value = value['value']
+            return tuple(value) if isinstance(value, list) else value
+
+        return IpLocation(**value)
+
+    def get(self, key):
+        """
+        Return value stored under given key or raise :py:exc:`KeyError` when
+        there is no such value or it has expired.
+
+        """
+
+        row = self._connection().execute('SELECT value FROM locations '
+                                         'WHERE provider = ? AND ip_address = ? AND expires >= ?',
+                                         (key[0], key[1], time.time())).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        return self._loads(row[0])
+
+    def set(self, key, value, ttl):
+        """
+        Store value under given key for given number of seconds.
+
+        """
+
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?)',
+                               (key[0], key[1], time.time() + ttl, self._dumps(value)))
+
+    def purge(self):
+        """
+        Remove expired entries.
+
+        """
+
+        with self._connection() as connection:
+            connection.execute('DELETE FROM locations WHERE expires < ?', (time.time(),))
+
+    def clear(self):
+        """
+        Remove all entries.
+
+        """
+
+        with self._connection() as connection:
+            connection.execute('DELETE FROM locations')
+
+
+class CachedDatabase(IGeoIpDatabase):
+    """
+    Geolocation database caching locations returned by another geolocation
+    database. IP addresses not found in the database
+    (:py:exc:`IpAddressNotFoundError`) are cached too, for ``negative_ttl``
+    seconds; other errors are never cached. Cached databases can be nested,
+    e.g. to keep :py:class:`MemoryCache` in front of :py:class:`SqliteCache`.
+
+    Locations are cached per database and its options ``db_path`` and
+    ``api_key`` (stored only as hash), so that different database files or
+    accounts of the same provider do not share entries.
+
+    .. attribute:: hits
+
+      Number of lookups answered from cache.
+
+    .. attribute:: misses
+
+      Number of lookups passed to the database.
+
+    """
+
+    def __init__(self, database, cache=None, ttl=3600, negative_ttl=300):
+        self.database = database
+        self.name = getattr(database, 'name', None) or database.__name__.lower()
+        self.cache = cache if cache is not None else MemoryCache()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, ip_address, options):
+        try:
+            ip_address = ipaddress.ip_address(ip_address).compressed
+        except ValueError:
+            pass
+
+        provider = self.name
+        db_path = options.get('db_path')
+        api_key = options.get('api_key')
+
+        if db_path is not None:
+            provider += ':' + os.path.abspath(db_path)
+
+        if api_key is not None:
+            provider += '#' + hashlib.sha256(str(api_key).encode('utf-8')).hexdigest()[:16]
+
+        return (provider, ip_address)
+
+    def _cached(self, key, ip_address):
+        try:
+            value = self.cache.get(key)
+        except KeyError:
+            with self._lock:
+                self.misses += 1
+
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        if isinstance(value, LocationError):
+            raise type(value)(*value.args)
+
+        # cached location may have been found for other notation of IP address
+        ip_location = copy.copy(value)
+        ip_location.ip_address = ip_address
+
+        return ip_location
+
+    def _store(self, key, value):
+        if isinstance(value, IpAddressNotFoundError):
+            if self.negative_ttl:
+                self.cache.set(key, value, self.negative_ttl)
+        elif not isinstance(value, LocationError):
+            self.cache.set(key, copy.copy(value), self.ttl)
+
+    def get(self, ip_address, **kwargs):
+        key = self._key(ip_address, kwargs)
+        ip_location = self._cached(key, ip_address)
+
+        if ip_location is None:
+            try:
+                ip_location = self.database.get(ip_address, **kwargs)
+            except LocationError as e:
+                self._store(key, e)
+                raise
+
+            self._store(key, ip_location)
+
+        return ip_location
+
+    def get_many(self, ip_addresses, **kwargs):
+        """
+        Yield location of each given IP address (or the exception raised
+        while getting it) in the same order as the IP addresses are given.
+        IP addresses are processed in chunks of :py:data:`GET_MANY_CHUNK`;
+        those not found in cache are passed to ``get_many`` of the database
+        at once, so that its batch lookups are used.
+
+        """
+
+        ip_addresses = iter(ip_addresses)
+
+        while True:
+            chunk = list(itertools.islice(ip_addresses, GET_MANY_CHUNK))
+
+            if not chunk:
+                break
+
+            keys = [self._key(ip_address, kwargs) for ip_address in chunk]
+            results = []
+            missed = []
+
+            for index, (key, ip_address) in enumerate(zip(keys, chunk)):
+                try:
+                    results.append(self._cached(key, ip_address))
+                except LocationError as e:
+                    results.append(e)
+
+                if results[-1] is None:
+                    missed.append(index)
+
+            if missed:
+                located = self.database.get_many([chunk[index] for index in missed], **kwargs)
+
+                for index, value in zip(missed, located):
+                    self._store(keys[index], value)
+                    results[index] = value
+
+            for value in results:
+                yield value
+
+    def preload(self, db_path=None):
+        return self.database.preload(db_path)
+
+    def get_batch(self, ip_addresses, **kwargs):
+        return lookup_batch(self.get_many, ip_addresses, **kwargs)
+
+    async def aget(self, ip_address, **kwargs):
+        key = self._key(ip_address, kwargs)
+        ip_location = self._cached(key, ip_address)
+
+        if ip_location is None:
+            try:
+                ip_location = await self.database.aget(ip_address, **kwargs)
+            except LocationError as e:
+                self._store(key, e)
+                raise
+
+            self._store(key, ip_location)
+
+        return ip_location
+
+    async def aget_many(self, ip_addresses, **kwargs):
+        return await alookup_many(self.aget, ip_addresses, **kwargs)
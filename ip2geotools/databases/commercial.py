@@ -11,16 +11,11 @@ from __future__ import absolute_import
 import json
 from urllib.parse import quote
 import re
-import requests
-from requests.auth import HTTPBasicAuth
-import pyquery
-from selenium import webdriver # selenium for Ip2LocationWeb
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 from ip2geotools.databases.interfaces import IGeoIpDatabase
+from ip2geotools.databases.sessions import get_session, async_request
+from ip2geotools.databases.browsers import BrowserPool
+from ip2geotools.databases.scraping import parse_table
 from ip2geotools.models import IpLocation
 from ip2geotools.errors import IpAddressNotFoundError, PermissionRequiredError, \
                                 InvalidRequestError, InvalidResponseError, \
@@ -38,13 +33,40 @@ class DbIpWeb(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.post('https://db-ip.com/',
-                                    headers={'User-Agent': 'Mozilla/5.0'},
-                                    data=[('address', ip_address)],
-                                    timeout=62)
+            request = get_session(DbIpWeb).request(**DbIpWeb._request(ip_address))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return DbIpWeb._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(DbIpWeb, **DbIpWeb._request(ip_address))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return DbIpWeb._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address):
+        return {
+            'method': 'POST',
+            'url': 'https://db-ip.com/',
+            'headers': {'User-Agent': 'Mozilla/5.0'},
+            'data': [('address', ip_address)],
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
+        import pyquery
+
         # check for HTTP errors
         if request.status_code != 200:
             raise ServiceError()
@@ -61,19 +83,11 @@ class DbIpWeb(IGeoIpDatabase):
                         .remove('span') \
                         .text() \
                         .strip()
-            parsed_country = pq('html > body > div.container table tr:contains("Country") td') \
-                             .text() \
-                             .strip()
-            parsed_region = pq('html > body > div.container table tr:contains("State / Region") td') \
-                            .text() \
-                            .strip()
-            parsed_city = pq('html > body > div.container table tr:contains("City") td') \
-                          .text() \
-                          .strip()
-            parsed_coords = pq('html > body > div.container table tr:contains("Coordinates") td') \
-                            .text() \
-                            .strip() \
-                            .split(',')
+            parsed_table = parse_table(*pq('html > body > div.container table'))
+            parsed_country = parsed_table.get('Country', '')
+            parsed_region = parsed_table.get('State / Region', '')
+            parsed_city = parsed_table.get('City', '')
+            parsed_coords = parsed_table.get('Coordinates', '').split(',')
         except:
             raise InvalidResponseError()
 
@@ -112,20 +126,45 @@ class MaxMindGeoIp2City(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            # optional auth for increasing amount of queries per day
-            if username != None and password != None:
-                auth = HTTPBasicAuth(username, password)
-            else:
-                auth = None
+            request = get_session(MaxMindGeoIp2City).request(**MaxMindGeoIp2City._request(ip_address, username, password))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
 
-            request = requests.get('https://www.maxmind.com/geoip/v2.1/city/'
-                                   + quote(ip_address)
-                                   + ('?demo=1' if auth == None else ''),
-                                   auth=auth,
-                                   timeout=62)
+        return MaxMindGeoIp2City._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(MaxMindGeoIp2City, **MaxMindGeoIp2City._request(ip_address, username, password))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return MaxMindGeoIp2City._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address, username, password):
+        # optional auth for increasing amount of queries per day
+        if username != None and password != None:
+            auth = (username, password)
+        else:
+            auth = None
+
+        return {
+            'method': 'GET',
+            'url': 'https://www.maxmind.com/geoip/v2.1/city/'
+                   + quote(ip_address)
+                   + ('?demo=1' if auth == None else ''),
+            'auth': auth,
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # parse content
         try:
             content = request.content.decode('utf-8')
@@ -185,19 +224,79 @@ class MaxMindGeoIp2City(IGeoIpDatabase):
         return ip_location
 
 
+def _create_firefox():
+    # selenium for Ip2LocationWeb
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options
+
+    # initiate headless Firefox using selenium to pass through Google reCAPTCHA
+    options = Options()
+    options.headless = True
+
+    return webdriver.Firefox(options=options)
+
+
+def _is_webdriver_error(exception):
+    # browser failed when WebDriver error was raised (possibly while handling it)
+    from selenium.common.exceptions import WebDriverException
+
+    while exception is not None:
+        if isinstance(exception, WebDriverException):
+            return True
+
+        exception = exception.__cause__ or exception.__context__
+
+    return False
+
+
 class Ip2LocationWeb(IGeoIpDatabase):
     """
     Class for accessing geolocation data provided by searching directly
     on https://www.ip2location.com/.
 
+    Running headless browsers are reused from :py:attr:`browsers`; a browser
+    is replaced only after WebDriver error.
+
     """
 
+    browsers = BrowserPool(_create_firefox, discard=_is_webdriver_error)
+
     @staticmethod
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
-        # initiate headless Firefox using selenium to pass through Google reCAPTCHA
-        options = Options()
-        options.headless = True
-        browser = webdriver.Firefox(options=options)
+        with Ip2LocationWeb.browsers.browser() as browser:
+            parsed_ip, parsed_country, parsed_region, parsed_city, parsed_coords = \
+                Ip2LocationWeb._browse(browser, ip_address)
+
+        # check for errors
+        if ip_address != parsed_ip:
+            raise IpAddressNotFoundError(ip_address)
+
+        # prepare return value
+        ip_location = IpLocation(ip_address)
+
+        # format data
+        try:
+            ip_location.country = parsed_country
+            ip_location.region = parsed_region
+            ip_location.city = parsed_city
+
+            parsed_coords = parsed_coords.split('(')[0].split(',')
+            ip_location.latitude = float(parsed_coords[0].strip())
+            ip_location.longitude = float(parsed_coords[1].strip())
+        except:
+            ip_location.country = None
+            ip_location.region = None
+            ip_location.city = None
+            ip_location.latitude = None
+            ip_location.longitude = None
+
+        return ip_location
+
+    @staticmethod
+    def _browse(browser, ip_address):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
 
         try:
             browser.get('http://www.ip2location.com/demo/' + ip_address)
@@ -240,33 +339,7 @@ class Ip2LocationWeb(IGeoIpDatabase):
         except:
             raise InvalidResponseError()
 
-        # exit headless firefox
-        browser.quit()
-
-        # check for errors
-        if ip_address != parsed_ip:
-            raise IpAddressNotFoundError(ip_address)
-
-        # prepare return value
-        ip_location = IpLocation(ip_address)
-
-        # format data
-        try:
-            ip_location.country = parsed_country
-            ip_location.region = parsed_region
-            ip_location.city = parsed_city
-
-            parsed_coords = parsed_coords.split('(')[0].split(',')
-            ip_location.latitude = float(parsed_coords[0].strip())
-            ip_location.longitude = float(parsed_coords[1].strip())
-        except:
-            ip_location.country = None
-            ip_location.region = None
-            ip_location.city = None
-            ip_location.latitude = None
-            ip_location.longitude = None
-
-        return ip_location
+        return parsed_ip, parsed_country, parsed_region, parsed_city, parsed_coords
 
 
 class NeustarWeb(IGeoIpDatabase):
@@ -280,13 +353,40 @@ class NeustarWeb(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.post('https://www.home.neustar/resources/tools/ip-geolocation-lookup-tool',
-                                    headers={'User-Agent': 'Mozilla/5.0'},
-                                    data=[('ip', ip_address)],
-                                    timeout=62)
+            request = get_session(NeustarWeb).request(**NeustarWeb._request(ip_address))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return NeustarWeb._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(NeustarWeb, **NeustarWeb._request(ip_address))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return NeustarWeb._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address):
+        return {
+            'method': 'POST',
+            'url': 'https://www.home.neustar/resources/tools/ip-geolocation-lookup-tool',
+            'headers': {'User-Agent': 'Mozilla/5.0'},
+            'data': [('ip', ip_address)],
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
+        import pyquery
+
         # check for HTTP errors
         if request.status_code != 200:
             raise ServiceError()
@@ -302,28 +402,13 @@ class NeustarWeb(IGeoIpDatabase):
             parsed_ip = pq('html > body > section.full.resource article h2 > strong') \
                         .text() \
                         .strip()
-            parsed_country = pq('html > body > section.full.resource article div.data >table:first tr:contains("Country Code:") td:not(.item)') \
-                             .text() \
-                             .strip() \
-                             .upper()
-            parsed_region = pq('html > body > section.full.resource article div.data >table:first tr:contains("Region:") td:not(.item)') \
-                            .text() \
-                            .strip() \
-                            .title()
-            parsed_state = pq('html > body > section.full.resource article div.data >table:first tr:contains("State:") td:not(.item)') \
-                           .text() \
-                           .strip() \
-                           .title()
-            parsed_city = pq('html > body > section.full.resource article div.data >table:first tr:contains("City:") td:not(.item)') \
-                          .text() \
-                          .strip() \
-                          .title()
-            parsed_latitude = pq('html > body > section.full.resource article div.data >table:first tr:contains("Latitude:") td:not(.item)') \
-                              .text() \
-                              .strip()
-            parsed_longitude = pq('html > body > section.full.resource article div.data >table:first tr:contains("Longitude:") td:not(.item)') \
-                               .text() \
-                               .strip()
+            parsed_table = parse_table(*pq('html > body > section.full.resource article div.data >table:first'))
+            parsed_country = parsed_table.get('Country Code', '').upper()
+            parsed_region = parsed_table.get('Region', '').title()
+            parsed_state = parsed_table.get('State', '').title()
+            parsed_city = parsed_table.get('City', '').title()
+            parsed_latitude = parsed_table.get('Latitude', '')
+            parsed_longitude = parsed_table.get('Longitude', '')
         except:
             raise InvalidResponseError()
 
@@ -367,12 +452,37 @@ class GeobytesCityDetails(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('http://getcitydetails.geobytes.com/GetCityDetails?fqcn='
-                                   + quote(ip_address),
-                                   timeout=62)
+            request = get_session(GeobytesCityDetails).request(**GeobytesCityDetails._request(ip_address))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return GeobytesCityDetails._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(GeobytesCityDetails, **GeobytesCityDetails._request(ip_address))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return GeobytesCityDetails._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address):
+        return {
+            'method': 'GET',
+            'url': 'http://getcitydetails.geobytes.com/GetCityDetails?fqcn='
+                   + quote(ip_address),
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             raise ServiceError()
@@ -412,15 +522,40 @@ class SkyhookContextAcceleratorIp(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('https://context.skyhookwireless.com/accelerator/ip?'
-                                   + 'ip=' + quote(ip_address)
-                                   + '&user=' + quote(username)
-                                   + '&key=' + quote(password)
-                                   + '&version=2.0',
-                                   timeout=62)
+            request = get_session(SkyhookContextAcceleratorIp).request(**SkyhookContextAcceleratorIp._request(ip_address, username, password))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return SkyhookContextAcceleratorIp._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(SkyhookContextAcceleratorIp, **SkyhookContextAcceleratorIp._request(ip_address, username, password))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return SkyhookContextAcceleratorIp._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address, username, password):
+        return {
+            'method': 'GET',
+            'url': 'https://context.skyhookwireless.com/accelerator/ip?'
+                   + 'ip=' + quote(ip_address)
+                   + '&user=' + quote(username)
+                   + '&key=' + quote(password)
+                   + '&version=2.0',
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             if request.status_code == 400:
@@ -491,11 +626,36 @@ class IpInfo(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('https://ipinfo.io/' + quote(ip_address) + '/geo/',
-                                   timeout=62)
+            request = get_session(IpInfo).request(**IpInfo._request(ip_address))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return IpInfo._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(IpInfo, **IpInfo._request(ip_address))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return IpInfo._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address):
+        return {
+            'method': 'GET',
+            'url': 'https://ipinfo.io/' + quote(ip_address) + '/geo/',
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             if request.status_code == 404:
@@ -543,14 +703,39 @@ class Eurek(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('https://https-api.eurekapi.com/iplocation/v1.8/locateip?'
-                                   + 'ip=' + quote(ip_address)
-                                   + '&key=' + quote(api_key)
-                                   + '&format=JSON',
-                                   timeout=62)
+            request = get_session(Eurek).request(**Eurek._request(ip_address, api_key))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return Eurek._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(Eurek, **Eurek._request(ip_address, api_key))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return Eurek._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address, api_key):
+        return {
+            'method': 'GET',
+            'url': 'https://https-api.eurekapi.com/iplocation/v1.8/locateip?'
+                   + 'ip=' + quote(ip_address)
+                   + '&key=' + quote(api_key)
+                   + '&format=JSON',
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             if request.status_code == 429:
@@ -624,12 +809,37 @@ class Ipdata(IGeoIpDatabase):
     def get(ip_address, api_key='test', db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('https://api.ipdata.co/' + quote(ip_address)
-                                   + '?api-key=' + quote(api_key),
-                                   timeout=62)
+            request = get_session(Ipdata).request(**Ipdata._request(ip_address, api_key))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return Ipdata._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key='test', db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(Ipdata, **Ipdata._request(ip_address, api_key))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return Ipdata._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address, api_key):
+        return {
+            'method': 'GET',
+            'url': 'https://api.ipdata.co/' + quote(ip_address)
+                   + '?api-key=' + quote(api_key),
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200 and request.status_code != 400:
             if request.status_code == 401:
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+Fan-out
+=======
+
+These classes send the same IP address to several geolocation databases
+concurrently and combine their answers, either by taking the first successful
+one or by majority vote on country and city. Requests which are no longer
+needed or which missed their deadlines are cancelled.
+
+"""
+import collections
+import queue
+import threading
+import time
+
+from ip2geotools.databases.interfaces import IGeoIpDatabase, lookup_many, lookup_batch, alookup_many
+from ip2geotools.errors import LocationError, IpAddressNotFoundError, InvalidResponseError, \
+                                ServiceError
+
+
+#: Strategy returning the first successful answer.
+FASTEST = 'fastest'
+
+#: Strategy returning answer agreed on by quorum of databases.
+QUORUM = 'quorum'
+
+
+class Provider(object):
+    """
+    Geolocation database queried by :py:class:`FanOutDatabase` with its own
+    options passed to its ``get`` method (e.g. ``api_key`` or ``db_path``,
+    overriding options of the whole query) and deadline in seconds (``None``
+    for deadline of :py:class:`FanOutDatabase`).
+
+    """
+
+    def __init__(self, database, timeout=None, **options):
+        self.database = database
+        self.timeout = timeout
+        self.options = options
+        self.name = getattr(database, 'name', None) or database.__name__.lower()
+
+    def __repr__(self):
+        return '{module}.{class_name}({data})'.format(
+            module=self.__module__,
+            class_name=self.__class__.__name__,
+            data=self.name)
+
+
+class _DaemonThreadPool(object):
+    # pool of daemon threads, whose requests still running at exit of
+    # interpreter are abandoned instead of being waited for (as threads of
+    # concurrent.futures.ThreadPoolExecutor are); threads running abandoned
+    # requests are not counted into size of the pool
+    def __init__(self, workers):
+        self._workers = workers
+        self._threads = 0
+        self._abandoned = set()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start_thread(self):
+        # with lock held
+        if self._threads - len(self._abandoned) < self._workers:
+            threading.Thread(target=self._work, daemon=True).start()
+            self._threads += 1
+
+    def submit(self, function, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        self._queue.put((future, function, args))
+
+        with self._lock:
+            self._start_thread()
+
+        return future
+
+    def abandon(self, future):
+        """
+        Cancel given request, or leave it running in its thread when it has
+        already started, so that the thread is replaced for other requests.
+
+        """
+
+        if future.cancel():
+            return
+
+        with self._lock:
+            if not future.done():
+                self._abandoned.add(future)
+
+                if not self._queue.empty():
+                    self._start_thread()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            future, function, args = item
+
+            # requests cancelled before they started are skipped
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except BaseException as e:  # pylint: disable=broad-except
+                    future.set_exception(e)
+
+            with self._lock:
+                self._abandoned.discard(future)
+
+                # thread which replaced this one while it was abandoned exits
+                if self._threads - len(self._abandoned) > self._workers:
+                    self._threads -= 1
+                    return
+
+    def shutdown(self):
+        with self._lock:
+            threads, self._threads = self._threads, 0
+
+        for _ in range(threads):
+            self._queue.put(None)
+
+
+class FanOutDatabase(IGeoIpDatabase):
+    """
+    Geolocation database querying several geolocation databases (given as
+    databases or :py:class:`Provider`) concurrently.
+
+    With strategy :py:data:`FASTEST` the first location returned by any
+    database is returned. With strategy :py:data:`QUORUM` a location is
+    returned as soon as given number of databases (majority by default) agree
+    on its country and city (case insensitive); the location returned by the
+    fastest of them is used and :py:exc:`InvalidResponseError` is raised when
+    they cannot agree. Remaining requests are cancelled once the answer is
+    known.
+
+    Databases which do not answer in their deadline (``timeout`` seconds by
+    default, no deadline when ``None``) are treated as failed with
+    :py:exc:`ServiceError`. When no location is found,
+    :py:exc:`IpAddressNotFoundError` is raised if no database found the IP
+    address, otherwise the error of the first failed database.
+
+    Blocking lookups run in pool of daemon threads of given size (four per
+    database by default). Requests which have not started yet are cancelled;
+    requests already running in a thread cannot be interrupted, so they
+    finish in background and their answers are discarded, without delaying
+    exit of the interpreter. Threads running such abandoned requests are not
+    counted into size of the pool, so that slow databases do not hold back
+    later lookups; a database which never answers keeps one thread per
+    abandoned request. Asynchronous lookups cancel their requests.
+
+    Errors other than :py:exc:`LocationError` (e.g. programming errors) are
+    not treated as failed databases, they are raised by the lookup.
+
+    """
+
+    def __init__(self, providers, strategy=FASTEST, quorum=None, timeout=None, workers=None):
+        self.providers = [provider if isinstance(provider, Provider) else Provider(provider)
+                          for provider in providers]
+
+        if not self.providers:
+            raise ValueError('at least one database is required')
+
+        if strategy not in (FASTEST, QUORUM):
+            raise ValueError('unknown strategy %r' % strategy)
+
+        if quorum is None:
+            quorum = len(self.providers) // 2 + 1
+        elif not 1 <= quorum <= len(self.providers):
+            raise ValueError('quorum must be between 1 and number of databases')
+
+        self.strategy = strategy
+        self.quorum = quorum
+        self.timeout = timeout
+        self.workers = workers or 4 * len(self.providers)
+        self.name = ','.join(provider.name for provider in self.providers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = _DaemonThreadPool(self.workers)
+
+        return self._executor
+
+    def close(self):
+        """
+        Shut down pool of threads (without waiting for running requests).
+
+        """
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown()
+
+    def _deadline(self, provider, start):
+        timeout = provider.timeout if provider.timeout is not None else self.timeout
+
+        return float('inf') if timeout is None else start + timeout
+
+    def _wait_time(self, requests, pending, start, now):
+        # time until the earliest deadline of pending requests
+        deadline = min(self._deadline(requests[request], start) for request in pending)
+
+        return None if deadline == float('inf') else max(deadline - now, 0)
+
+    def _collect(self, requests, pending, results, start, now, cancel):
+        # move finished requests (in order in which they finished) and then
+        # overdue requests (in order of providers) from pending into results
+        done = [request for request in pending if request.done()]
+        overdue = [request for request in pending
+                   if request not in done and now >= self._deadline(requests[request], start)]
+
+        for _, result in sorted((request.result() for request in done), key=lambda item: item[0]):
+            results.append(result)
+
+        for request in overdue:
+            cancel(request)
+            results.append(ServiceError('%s did not respond in time' % requests[request].name))
+
+        pending[:] = [request for request in pending if request not in done and request not in overdue]
+
+    @staticmethod
+    def _vote(ip_location):
+        return tuple((value or '').lower() for value in (ip_location.country, ip_location.city))
+
+    def _decide(self, ip_address, results, pending):
+        # location chosen from results received so far, None while undecided
+        locations = [result for result in results if not isinstance(result, LocationError)]
+
+        if self.strategy == FASTEST:
+            if locations:
+                return locations[0]
+        else:
+            votes = collections.Counter(self._vote(ip_location) for ip_location in locations)
+
+            for ip_location in locations:
+                if votes[self._vote(ip_location)] >= self.quorum:
+                    return ip_location
+
+            if max(votes.values(), default=0) + pending < self.quorum:
+                pending = 0
+
+        if pending:
+            return None
+
+        errors = [result for result in results if isinstance(result, LocationError)]
+
+        if locations:
+            raise InvalidResponseError('less than %d databases agree on location of %s'
+                                       % (self.quorum, ip_address))
+        elif all(isinstance(error, IpAddressNotFoundError) for error in errors):
+            raise IpAddressNotFoundError(ip_address)
+
+        raise errors[0]
+
+    @staticmethod
+    def _get(provider, ip_address, options):
+        # result with time when it was received
+        try:
+            result = provider.database.get(ip_address, **dict(options, **provider.options))
+        except LocationError as e:
+            result = e
+
+        return time.monotonic(), result
+
+    @staticmethod
+    async def _aget(provider, ip_address, options):
+        try:
+            result = await provider.database.aget(ip_address, **dict(options, **provider.options))
+        except LocationError as e:
+            result = e
+
+        return time.monotonic(), result
+
+    def get(self, ip_address, **kwargs):
+        executor = self._get_executor()
+        start = time.monotonic()
+        pending = [executor.submit(self._get, provider, ip_address, kwargs)
+                   for provider in self.providers]
+        requests = dict(zip(pending, self.providers))
+        results = []
+
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        try:
+            while True:
+                ip_location = self._decide(ip_address, results, len(pending))
+
+                if ip_location is not None:
+                    return ip_location
+
+                wait(pending,
+                     timeout=self._wait_time(requests, pending, start, time.monotonic()),
+                     return_when=FIRST_COMPLETED)
+                self._collect(requests, pending, results, start, time.monotonic(),
+                              executor.abandon)
+        finally:
+            for request in pending:
+                executor.abandon(request)
+
+    def get_many(self, ip_addresses, **kwargs):
+        return lookup_many(self.get, ip_addresses, **kwargs)
+
+    def get_batch(self, ip_addresses, **kwargs):
+        return lookup_batch(self.get_many, ip_addresses, **kwargs)
+
+    def preload(self, db_path=None):
+        return [provider.database.preload(provider.options.get('db_path', db_path))
+                for provider in self.providers]
+
+    async def aget(self, ip_address, **kwargs):
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        pending = [asyncio.ensure_future(self._aget(provider, ip_address, kwargs))
+                   for provider in self.providers]
+        requests = dict(zip(pending, self.providers))
+        results = []
+
+        try:
+            while True:
+                ip_location = self._decide(ip_address, results, len(pending))
+
+                if ip_location is not None:
+                    return ip_location
+
+                await asyncio.wait(pending,
+                                   timeout=self._wait_time(requests, pending, start, loop.time()),
+                                   return_when=asyncio.FIRST_COMPLETED)
+                self._collect(requests, pending, results, start, loop.time(),
+                              lambda request: request.cancel())
+        finally:
+            for request in pending:
+                request.cancel()
+
+    async def aget_many(self, ip_addresses, **kwargs):
+        return await alookup_many(self.aget, ip_addresses, **kwargs)
+
+    def __repr__(self):
+        return '{module}.{class_name}({data})'.format(
+            module=self.__module__,
+            class_name=self.__class__.__name__,
+            data=self.name)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Geocoding
+=========
+
+This module resolves coordinates of cities for geolocation databases which
+provide only names of city, region and country (e.g.
+:py:class:`ip2geotools.databases.noncommercial.DbIpCity`). Coordinates are
+looked up in local gazetteer (e.g. GeoNames dump) if available, otherwise at
+OpenStreetMap and cached, so every city is geocoded only once.
+
+"""
+import array
+import io
+
+from ip2geotools.databases.cache import MemoryCache
+from ip2geotools.databases.sessions import get_session
+
+
+def _normalize(value):
+    return (value or '').strip().casefold()
+
+
+class Gazetteer(object):
+    """
+    Offline index of coordinates of cities loaded from GeoNames dump
+    (``cities500.txt``, ``cities15000.txt``, ``allCountries.txt``, ... from
+    https://download.geonames.org/export/dump/).
+
+    Coordinates are stored in two arrays of floats and indexed by normalized
+    ``(country, region, city)`` and ``(country, city)``; the latter refers to
+    the most populous city of given name in the country.
+
+    """
+
+    def __init__(self):
+        self._latitudes = array.array('d')
+        self._longitudes = array.array('d')
+        self._populations = array.array('q')
+        self._index = {}
+
+    def __len__(self):
+        return len(self._latitudes)
+
+    @classmethod
+    def load(cls, path, admin1_path=None):
+        """
+        Load gazetteer from GeoNames dump. Names of regions are resolved using
+        ``admin1CodesASCII.txt`` when its path is given, otherwise cities can
+        be located by country and city only.
+
+        """
+
+        regions = {}
+
+        if admin1_path:
+            with io.open(admin1_path, encoding='utf-8') as admin1_file:
+                for line in admin1_file:
+                    fields = line.rstrip('\n').split('\t')
+
+                    if len(fields) >= 3:
+                        regions[fields[0]] = (fields[1], fields[2])
+
+        gazetteer = cls()
+
+        with io.open(path, encoding='utf-8') as dump_file:
+            for line in dump_file:
+                fields = line.rstrip('\n').split('\t')
+
+                # only populated places
+                if len(fields) < 15 or fields[6] != 'P':
+                    continue
+
+                gazetteer.add(names=(fields[1], fields[2]),
+                              regions=regions.get(fields[8] + '.' + fields[10], ()),
+                              country=fields[8],
+                              latitude=float(fields[4]),
+                              longitude=float(fields[5]),
+                              population=int(fields[14] or 0))
+
+        return gazetteer
+
+    def add(self, names, regions, country, latitude, longitude, population=0):
+        """
+        Add city known under given names located in one of given regions
+        (names of the same region) and country.
+
+        """
+
+        row = len(self._latitudes)
+        self._latitudes.append(latitude)
+        self._longitudes.append(longitude)
+        self._populations.append(population)
+
+        country = _normalize(country)
+
+        for name in set(_normalize(name) for name in names):
+            for region in set(_normalize(region) for region in regions):
+                self._index.setdefault((country, region, name), row)
+
+            other = self._index.get((country, name))
+
+            if other is None or self._populations[other] < population:
+                self._index[(country, name)] = row
+
+    def locate(self, city, region, country):
+        """
+        Return coordinates ``(latitude, longitude)`` of given city or ``None``
+        when the city is not in gazetteer.
+
+        """
+
+        city = _normalize(city)
+        country = _normalize(country)
+        row = self._index.get((country, _normalize(region), city))
+
+        if row is None:
+            row = self._index.get((country, city))
+
+            if row is None:
+                return None
+
+        return (self._latitudes[row], self._longitudes[row])
+
+
+class CityLocator(object):
+    """
+    Resolver of coordinates of cities given by ``(city, region, country)``.
+
+    Cities are looked up in given :py:class:`Gazetteer` first. Other cities
+    are geocoded at OpenStreetMap (unless ``online`` is false) and resolved
+    coordinates (or cities which were not found) are stored in given cache,
+    which can be :py:class:`ip2geotools.databases.cache.MemoryCache` or
+    persistent :py:class:`ip2geotools.databases.cache.SqliteCache`.
+
+    """
+
+    def __init__(self, cache=None, ttl=30 * 24 * 3600, gazetteer=None, online=True):
+        self.cache = cache if cache is not None else MemoryCache()
+        self.ttl = ttl
+        self.gazetteer = gazetteer
+        self.online = online
+
+    @staticmethod
+    def _key(city, region, country):
+        return ('osm', '|'.join(_normalize(value) for value in (country, region, city)))
+
+    def locate(self, city, region, country):
+        """
+        Return coordinates ``(latitude, longitude)`` of given city or ``None``
+        when the city was not found.
+
+        """
+
+        if self.gazetteer is not None:
+            coordinates = self.gazetteer.locate(city, region, country)
+
+            if coordinates is not None or not self.online:
+                return coordinates
+
+        key = self._key(city, region, country)
+
+        try:
+            return self.cache.get(key)
+        except KeyError:
+            pass
+
+        coordinates, found = self._geocode(city, region, country)
+
+        # do not remember cities which could not be looked up at all
+        if found:
+            self.cache.set(key, coordinates, self.ttl)
+
+        return coordinates
+
+    def locate_many(self, places):
+        """
+        Return dictionary of coordinates (or ``None``) of given places
+        ``(city, region, country)``. Every distinct place is resolved only
+        once.
+
+        """
+
+        return {place: self.locate(*place) for place in set(places)}
+
+    @staticmethod
+    def _geocode(city, region, country):
+        import geocoder
+
+        # get lat/lon from OSM
+        osm = geocoder.osm((city or '') + ', ' + (region or '') + ' ' + (country or ''),
+                           timeout=62,
+                           session=get_session(geocoder.osm))
+
+        if not osm.ok:
+            osm = geocoder.osm((city or '') + ', ' + (country or ''),
+                               timeout=62,
+                               session=get_session(geocoder.osm))
+
+        if osm.ok:
+            osm = osm.json
+            return (float(osm['lat']), float(osm['lng'])), True
+
+        return None, not osm.error
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Handles
+=======
+
+This module provides a process-wide registry of long-lived handles to local
+geolocation database files, so that a database is opened once and shared by
+all lookups instead of being opened again for every IP address.
+
+Handles can be also loaded in advance (see ``preload`` method of local
+databases) in master process of pre-fork server, so that all its workers share
+them; :py:func:`freeze` should be then called right before forking.
+
+"""
+import atexit
+import gc
+import os
+import threading
+
+
+class HandleRegistry(object):
+    """
+    Thread-safe registry of open database handles keyed by database path.
+
+    A handle is created by calling ``opener(db_path)`` the first time the path
+    is requested. The file on disk is checked on every request and when it has
+    been replaced (different inode, size or modification time) a new handle is
+    opened and swapped in atomically. The replaced handle is not closed
+    explicitly, as other threads may still be reading from it; it is released
+    once the last reference to it is dropped. All handles still registered are
+    closed when the interpreter exits.
+
+    """
+
+    def __init__(self, opener):
+        self._opener = opener
+        self._handles = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close_all)
+
+        # lock may be held by another thread of parent process while forking
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(db_path):
+        stat = os.stat(db_path)
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, db_path):
+        """
+        Return an open handle for given database path.
+
+        """
+
+        signature = self._signature(db_path)
+        entry = self._handles.get(db_path)
+
+        if entry is None or entry[1] != signature:
+            with self._lock:
+                entry = self._handles.get(db_path)
+
+                if entry is None or entry[1] != signature:
+                    entry = (self._opener(db_path), signature)
+                    self._handles[db_path] = entry
+
+        return entry[0]
+
+    def put(self, db_path, handle):
+        """
+        Register given open handle for given database path in place of the
+        current one, e.g. handle prepared for sharing by forked processes.
+
+        """
+
+        signature = self._signature(db_path)
+
+        with self._lock:
+            self._handles[db_path] = (handle, signature)
+
+    def close(self, db_path):
+        """
+        Close and forget the handle for given database path (if any).
+
+        """
+
+        with self._lock:
+            entry = self._handles.pop(db_path, None)
+
+        if entry is not None:
+            self._close_handle(entry[0])
+
+    def close_all(self):
+        """
+        Close and forget all registered handles.
+
+        """
+
+        with self._lock:
+            entries = list(self._handles.values())
+            self._handles.clear()
+
+        for entry in entries:
+            self._close_handle(entry[0])
+
+    @staticmethod
+    def _close_handle(handle):
+        try:
+            handle.close()
+        except:
+            pass
+
+
+def freeze():
+    """
+    Move all objects of current process (e.g. preloaded handles) into
+    permanent generation of garbage collector (:py:func:`gc.freeze`), so that
+    garbage collections in processes forked afterwards do not write into
+    their memory pages, which would then be copied into every process.
+
+    To keep as many pages shared as possible, garbage collection should be
+    disabled (:py:func:`gc.disable`) early in the parent process, this
+    function called right before forking and garbage collection enabled again
+    in forked processes. Does nothing on Python without :py:func:`gc.freeze`
+    (older than 3.7).
+
+    """
+
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
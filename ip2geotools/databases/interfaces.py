@@ -8,6 +8,61 @@ by geolocation databases.
 
 """
 from abc import ABCMeta, abstractmethod
+import functools
+
+from ip2geotools.models import IpLocationBatch
+from ip2geotools.errors import LocationError
+
+
+def lookup_many(get, ip_addresses, **kwargs):
+    """
+    Yield location of each given IP address got by given function ``get``
+    (or the :py:exc:`ip2geotools.errors.LocationError` raised while getting
+    it) in the same order as the IP addresses are given. Keyword arguments
+    are passed to ``get``.
+
+    """
+
+    for ip_address in ip_addresses:
+        try:
+            yield get(ip_address, **kwargs)
+        except LocationError as e:
+            yield e
+
+
+def lookup_batch(get_many, ip_addresses, **kwargs):
+    """
+    Return :py:class:`ip2geotools.models.IpLocationBatch` of locations of
+    given IP addresses got by given function ``get_many``, leaving out IP
+    addresses whose location could not be got. Keyword arguments are passed
+    to ``get_many``.
+
+    """
+
+    return IpLocationBatch(ip_location
+                           for ip_location in get_many(ip_addresses, **kwargs)
+                           if not isinstance(ip_location, LocationError))
+
+
+async def alookup_many(aget, ip_addresses, **kwargs):
+    """
+    Return list of locations of given IP addresses got concurrently by given
+    coroutine function ``aget`` (or the
+    :py:exc:`ip2geotools.errors.LocationError` raised while getting them) in
+    the same order as the IP addresses are given. Keyword arguments are
+    passed to ``aget``.
+
+    """
+
+    import asyncio
+
+    async def aget_location(ip_address):
+        try:
+            return await aget(ip_address, **kwargs)
+        except LocationError as e:
+            return e
+
+    return await asyncio.gather(*[aget_location(ip_address) for ip_address in ip_addresses])
 
 
 class IGeoIpDatabase:
@@ -28,3 +83,71 @@ class IGeoIpDatabase:
 
         raise NotImplementedError
 
+    @classmethod
+    def get_many(cls, ip_addresses, **kwargs):
+        """
+        Method for getting locations of many IP addresses.
+
+        Yields location of each given IP address (or the exception raised
+        while getting it) in the same order as the IP addresses are given.
+        Keyword arguments are passed to :py:meth:`get`.
+
+        """
+
+        return lookup_many(cls.get, ip_addresses, **kwargs)
+
+    @classmethod
+    def preload(cls, db_path=None):
+        """
+        Method for loading database file (given by ``db_path``) in advance,
+        e.g. in master process of pre-fork server before workers are forked,
+        so that all of them share it (see
+        :py:func:`ip2geotools.databases.handles.freeze`).
+
+        Returns the loaded handle; databases without local files have nothing
+        to load and return ``None``.
+
+        """
+
+        return None
+
+    @classmethod
+    def get_batch(cls, ip_addresses, **kwargs):
+        """
+        Method for getting locations of many IP addresses as columnar
+        :py:class:`ip2geotools.models.IpLocationBatch`.
+
+        IP addresses whose location could not be got are left out of the
+        batch. Keyword arguments are passed to :py:meth:`get_many`.
+
+        """
+
+        return lookup_batch(cls.get_many, ip_addresses, **kwargs)
+
+    @classmethod
+    async def aget(cls, ip_address, **kwargs):
+        """
+        Coroutine for getting location of given IP address.
+
+        Databases accessed over HTTP override it with truly asynchronous
+        requests; others run :py:meth:`get` in the default executor.
+
+        """
+
+        import asyncio
+
+        return await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(cls.get, ip_address, **kwargs))
+
+    @classmethod
+    async def aget_many(cls, ip_addresses, **kwargs):
+        """
+        Coroutine for getting locations of many IP addresses concurrently.
+
+        Returns list of locations of given IP addresses (or the exceptions
+        raised while getting them) in the same order as the IP addresses are
+        given. Keyword arguments are passed to :py:meth:`aget`.
+
+        """
+
+        return await alookup_many(cls.aget, ip_addresses, **kwargs)
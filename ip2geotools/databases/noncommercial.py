@@ -9,15 +9,18 @@ These classes access many different free geolocation databases.
 # pylint: disable=no-member
 from __future__ import absolute_import
 import json
+import itertools
+import os
+import threading
 from urllib.parse import quote
-import requests
-import geocoder
-import geoip2.database
-import IP2Location
 
 from ip2geotools.databases.interfaces import IGeoIpDatabase
+from ip2geotools.databases.sessions import get_session, async_request
+from ip2geotools.databases.handles import HandleRegistry
+from ip2geotools.databases.geocoding import CityLocator
+from ip2geotools.databases.ranges import RangeIndex
 from ip2geotools.models import IpLocation
-from ip2geotools.errors import IpAddressNotFoundError, PermissionRequiredError, \
+from ip2geotools.errors import LocationError, IpAddressNotFoundError, PermissionRequiredError, \
                                 InvalidRequestError, InvalidResponseError, ServiceError, \
                                 LimitExceededError
 
@@ -26,19 +29,98 @@ class DbIpCity(IGeoIpDatabase):
     """
     Class for accessing geolocation data provided by https://db-ip.com/api/.
 
+    Coordinates of cities are resolved by :py:attr:`locator`, which caches
+    them, so every city is geocoded only once. Subclass with its own
+    :py:attr:`locator` can be used to resolve them differently.
+
     """
 
-    @staticmethod
-    def get(ip_address, api_key='free', db_path=None, username=None, password=None):
+    locator = CityLocator()
+
+    @classmethod
+    def get(cls, ip_address, api_key='free', db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = get_session(DbIpCity).request(**DbIpCity._request(ip_address, api_key))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        ip_location = DbIpCity._response(ip_address, request)
+        cls._geocode(ip_location)
+
+        return ip_location
+
+    @classmethod
+    def get_many(cls, ip_addresses, api_key='free', db_path=None, username=None, password=None):
+        ip_addresses = iter(ip_addresses)
+
+        while True:
+            chunk = list(itertools.islice(ip_addresses, 256))
+
+            if not chunk:
+                break
+
+            # look up all IP addresses of chunk first ...
+            results = []
+
+            for ip_address in chunk:
+                try:
+                    try:
+                        request = get_session(DbIpCity).request(**cls._request(ip_address, api_key))
+                    except ImportError:
+                        raise
+                    except:
+                        raise ServiceError()
+
+                    results.append(cls._response(ip_address, request))
+                except LocationError as e:
+                    results.append(e)
+
+            # ... then geocode every distinct city only once
+            coordinates = cls.locator.locate_many(
+                (result.city, result.region, result.country)
+                for result in results
+                if not isinstance(result, LocationError))
+
+            for result in results:
+                if not isinstance(result, LocationError):
+                    result.latitude, result.longitude = \
+                        coordinates[(result.city, result.region, result.country)] or (None, None)
+
+                yield result
+
+    @classmethod
+    async def aget(cls, ip_address, api_key='free', db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('http://api.db-ip.com/v2/'
-                                   + quote(api_key)
-                                   + '/' + quote(ip_address),
-                                   timeout=62)
+            request = await async_request(DbIpCity, **DbIpCity._request(ip_address, api_key))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
-        
+
+        ip_location = DbIpCity._response(ip_address, request)
+
+        # geocoder is synchronous only
+        import asyncio
+        await asyncio.get_event_loop().run_in_executor(None, cls._geocode, ip_location)
+
+        return ip_location
+
+    @staticmethod
+    def _request(ip_address, api_key):
+        return {
+            'method': 'GET',
+            'url': 'http://api.db-ip.com/v2/'
+                   + quote(api_key)
+                   + '/' + quote(ip_address),
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             raise ServiceError()
@@ -67,28 +149,19 @@ class DbIpCity(IGeoIpDatabase):
         ip_location.region = content.get('stateProv')
         ip_location.city = content.get('city')
 
-        # get lat/lon from OSM
-        osm = geocoder.osm(content.get('city', '') + ', '
-                           + content.get('stateProv', '') + ' '
-                           + content.get('countryCode', ''),
-                           timeout=62)
-
-        if osm.ok:
-            osm = osm.json
-            ip_location.latitude = float(osm['lat'])
-            ip_location.longitude = float(osm['lng'])
-        else:
-            osm = geocoder.osm(content.get('city', '') + ', ' + content.get('countryCode', ''), timeout=62)
+        return ip_location
 
-            if osm.ok:
-                osm = osm.json
-                ip_location.latitude = float(osm['lat'])
-                ip_location.longitude = float(osm['lng'])
-            else:
-                ip_location.latitude = None
-                ip_location.longitude = None
+    @classmethod
+    def _geocode(cls, ip_location):
+        coordinates = cls.locator.locate(ip_location.city,
+                                         ip_location.region,
+                                         ip_location.country)
 
-        return ip_location
+        if coordinates:
+            ip_location.latitude, ip_location.longitude = coordinates
+        else:
+            ip_location.latitude = None
+            ip_location.longitude = None
 
 
 class HostIP(IGeoIpDatabase):
@@ -101,12 +174,37 @@ class HostIP(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('http://api.hostip.info/get_json.php?position=true&ip='
-                                   + quote(ip_address),
-                                   timeout=62)
+            request = get_session(HostIP).request(**HostIP._request(ip_address))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return HostIP._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(HostIP, **HostIP._request(ip_address))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return HostIP._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address):
+        return {
+            'method': 'GET',
+            'url': 'http://api.hostip.info/get_json.php?position=true&ip='
+                   + quote(ip_address),
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             if request.status_code == 404:
@@ -169,8 +267,8 @@ class Freegeoip(IGeoIpDatabase):
         """
         # process request
         try:
-            request = requests.get('http://freegeoip.net/json/' + quote(ip_address),
-                                   timeout=62)
+            request = get_session(Freegeoip).get('http://freegeoip.net/json/' + quote(ip_address),
+                                                 timeout=62)
         except:
             raise ServiceError()
 
@@ -232,12 +330,37 @@ class Ipstack(IGeoIpDatabase):
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = requests.get('http://api.ipstack.com/' + quote(ip_address)
-                                   + '?access_key=' + quote(api_key),
-                                   timeout=62)
+            request = get_session(Ipstack).request(**Ipstack._request(ip_address, api_key))
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return Ipstack._response(ip_address, request)
+
+    @staticmethod
+    async def aget(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = await async_request(Ipstack, **Ipstack._request(ip_address, api_key))
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return Ipstack._response(ip_address, request)
+
+    @staticmethod
+    def _request(ip_address, api_key):
+        return {
+            'method': 'GET',
+            'url': 'http://api.ipstack.com/' + quote(ip_address)
+                   + '?access_key=' + quote(api_key),
+            'timeout': 62,
+        }
+
+    @staticmethod
+    def _response(ip_address, request):
         # check for HTTP errors
         if request.status_code != 200:
             raise ServiceError()
@@ -282,27 +405,88 @@ class Ipstack(IGeoIpDatabase):
         return ip_location
 
 
+def _open_maxmind_reader(db_path):
+    import geoip2.database
+
+    # MODE_AUTO memory-maps the file by C extension of maxminddb when installed
+    # (MODE_MMAP would force its pure Python decoder)
+    return geoip2.database.Reader(db_path, mode=geoip2.database.MODE_AUTO)
+
+
 class MaxMindGeoLite2City(IGeoIpDatabase):
     """
     Class for accessing geolocation data provided by GeoLite2 database
     created by MaxMind, available from https://www.maxmind.com/.
     Downloadable from https://dev.maxmind.com/geoip/geoip2/geolite2/.
 
+    Database files are memory-mapped and opened only once per process,
+    see :py:attr:`readers`.
+
     """
 
+    readers = HandleRegistry(_open_maxmind_reader)
+
     @staticmethod
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            request = geoip2.database.Reader(db_path)
+            request = MaxMindGeoLite2City.readers.get(db_path)
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return MaxMindGeoLite2City._lookup(request, ip_address)
+
+    @classmethod
+    def preload(cls, db_path=None):
+        """
+        Open memory-mapped reader of given database file in advance, see
+        :py:meth:`ip2geotools.databases.interfaces.IGeoIpDatabase.preload`.
+
+        """
+
+        return cls.readers.get(db_path)
+
+    @classmethod
+    def get_many(cls, ip_addresses, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            request = cls.readers.get(db_path)
+        except ImportError:
+            raise
+        except:
+            request = None
+
+        for ip_address in ip_addresses:
+            try:
+                if request is None:
+                    raise ServiceError()
+
+                yield cls._lookup(request, ip_address)
+            except LocationError as e:
+                yield e
+
+    @staticmethod
+    def get_arrays(ipv4=None, ipv6_high=None, ipv6_low=None, db_path=None):
+        """
+        Return locations of IP addresses given as :py:mod:`numpy` arrays as
+        columnar :py:class:`ip2geotools.models.IpLocationBatch`, see
+        :py:meth:`LocalRangeIndex.get_arrays`.
+
+        """
+
+        return LocalRangeIndex.get_arrays(ipv4, ipv6_high, ipv6_low, db_path=db_path)
+
+    @staticmethod
+    def _lookup(request, ip_address):
+        import geoip2.errors
+
         # content
         try:
             res = request.city(ip_address)
-        except TypeError:
-            raise InvalidRequestError()
+        except (TypeError, ValueError):
+            raise InvalidRequestError(ip_address)
         except geoip2.errors.AddressNotFoundError:
             raise IpAddressNotFoundError(ip_address)
 
@@ -335,23 +519,161 @@ class MaxMindGeoLite2City(IGeoIpDatabase):
         return ip_location
 
 
+class _Ip2LocationHandle(object):
+    """
+    Long-lived handle to IP2Location BIN database which can be shared across
+    threads. The database is memory-mapped when the installed IP2Location
+    library supports it; every thread then reads it by its own mapping, so
+    lookups of threads do not wait for each other.
+
+    """
+
+    # guards reopening of files in forked processes, reset in every forked process
+    _fork_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self._db_path = db_path
+        self._databases = []
+        self._open()
+
+    def _open(self):
+        import IP2Location
+
+        try:
+            database = IP2Location.IP2Location(self._db_path, 'SHARED_MEMORY')
+        except TypeError:
+            # IP2Location library without access modes
+            database = IP2Location.IP2Location()
+            database.open(self._db_path)
+
+            # offset of file is shared with forked processes, which reopen it
+            self._pid = os.getpid()
+            self._local = None
+        else:
+            # IP2Location seeks in the mapping and keeps looked up IP address
+            # in its object, so other threads open their own mappings
+            self._pid = None
+            self._local = threading.local()
+            self._local.database = database
+
+        # IP2Location seeks and reads from one shared file object; new lock,
+        # as lock inherited by forked process may have been held while forking
+        self._lock = threading.Lock()
+        self._database = database
+        self._databases.append(database)
+
+    def _thread_database(self):
+        import IP2Location
+
+        database = IP2Location.IP2Location(self._db_path, 'SHARED_MEMORY')
+
+        with self._lock:
+            self._databases.append(database)
+
+        self._local.database = database
+
+        return database
+
+    @classmethod
+    def _reset_fork_lock(cls):
+        cls._fork_lock = threading.Lock()
+
+    def get_all(self, ip_address):
+        if self._local is not None:
+            database = getattr(self._local, 'database', None)
+
+            if database is None:
+                database = self._thread_database()
+
+            return database.get_all(ip_address)
+
+        if self._pid != os.getpid():
+            with _Ip2LocationHandle._fork_lock:
+                if self._pid != os.getpid():
+                    self._open()
+
+        with self._lock:
+            return self._database.get_all(ip_address)
+
+    def close(self):
+        with self._lock:
+            databases = self._databases
+            self._databases = []
+
+        for database in databases:
+            database.close()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_Ip2LocationHandle._reset_fork_lock)
+
+
 class Ip2Location(IGeoIpDatabase):
     """
     Class for accessing geolocation data provided by IP2Location,
     available from https://www.ip2location.com/.
     Downloadable from http://lite.ip2location.com/database/ip-country-region-city-latitude-longitude.
 
+    Database files are opened only once per process, see :py:attr:`handles`.
+
     """
 
+    handles = HandleRegistry(_Ip2LocationHandle)
+
     @staticmethod
     def get(ip_address, api_key=None, db_path=None, username=None, password=None):
         # process request
         try:
-            ip2loc = IP2Location.IP2Location()
-            ip2loc.open(db_path)
+            ip2loc = Ip2Location.handles.get(db_path)
+        except ImportError:
+            raise
         except:
             raise ServiceError()
 
+        return Ip2Location._lookup(ip2loc, ip_address)
+
+    @classmethod
+    def preload(cls, db_path=None):
+        """
+        Open handle of given database file in advance, see
+        :py:meth:`ip2geotools.databases.interfaces.IGeoIpDatabase.preload`.
+
+        """
+
+        return cls.handles.get(db_path)
+
+    @classmethod
+    def get_many(cls, ip_addresses, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            ip2loc = cls.handles.get(db_path)
+        except ImportError:
+            raise
+        except:
+            ip2loc = None
+
+        for ip_address in ip_addresses:
+            try:
+                if ip2loc is None:
+                    raise ServiceError()
+
+                yield cls._lookup(ip2loc, ip_address)
+            except LocationError as e:
+                yield e
+
+    @staticmethod
+    def get_arrays(ipv4=None, ipv6_high=None, ipv6_low=None, db_path=None):
+        """
+        Return locations of IP addresses given as :py:mod:`numpy` arrays as
+        columnar :py:class:`ip2geotools.models.IpLocationBatch`, see
+        :py:meth:`LocalRangeIndex.get_arrays`.
+
+        """
+
+        return LocalRangeIndex.get_arrays(ipv4, ipv6_high, ipv6_low, db_path=db_path)
+
+    @staticmethod
+    def _lookup(ip2loc, ip_address):
         # content
         res = ip2loc.get_all(ip_address)
 
@@ -395,3 +717,86 @@ class Ip2Location(IGeoIpDatabase):
 
         return ip_location
 
+
+class LocalRangeIndex(IGeoIpDatabase):
+    """
+    Class for fast lookups in GeoLite2 (``.mmdb``) or IP2Location (``.BIN``)
+    database file compiled into in-memory range index
+    (:py:class:`ip2geotools.databases.ranges.RangeIndex`), or in snapshot
+    file of the index created by command ``ip2geotools compile``.
+
+    Database file is compiled (or snapshot loaded) only once per process (and
+    again when it is replaced), see :py:attr:`indexes`.
+
+    """
+
+    indexes = HandleRegistry(RangeIndex.open)
+
+    @staticmethod
+    def get(ip_address, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            index = LocalRangeIndex.indexes.get(db_path)
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return index.lookup(ip_address)
+
+    @classmethod
+    def preload(cls, db_path=None):
+        """
+        Compile (or load) range index of given database file in advance and
+        replace it by its packed form
+        (:py:meth:`ip2geotools.databases.ranges.RangeIndex.packed`), whose
+        pages stay shared by processes forked afterwards, see
+        :py:meth:`ip2geotools.databases.interfaces.IGeoIpDatabase.preload`.
+
+        """
+
+        index = cls.indexes.get(db_path).packed()
+        cls.indexes.put(db_path, index)
+
+        return index
+
+    @classmethod
+    def get_many(cls, ip_addresses, api_key=None, db_path=None, username=None, password=None):
+        # process request
+        try:
+            index = cls.indexes.get(db_path)
+        except ImportError:
+            raise
+        except:
+            index = None
+
+        for ip_address in ip_addresses:
+            try:
+                if index is None:
+                    raise ServiceError()
+
+                yield index.lookup(ip_address)
+            except LocationError as e:
+                yield e
+
+    @staticmethod
+    def get_arrays(ipv4=None, ipv6_high=None, ipv6_low=None, db_path=None):
+        """
+        Return locations of IPv4 addresses given as :py:mod:`numpy` array of
+        unsigned 32-bit integers followed by IPv6 addresses given as arrays of
+        their high and low 64 bits as columnar
+        :py:class:`ip2geotools.models.IpLocationBatch`, resolved by single
+        vectorized search (see
+        :py:meth:`ip2geotools.databases.ranges.RangeIndex.lookup_arrays`).
+
+        """
+
+        # process request
+        try:
+            index = LocalRangeIndex.indexes.get(db_path)
+        except ImportError:
+            raise
+        except:
+            raise ServiceError()
+
+        return index.lookup_arrays(ipv4, ipv6_high, ipv6_low)
@@ -0,0 +1,736 @@
+# -*- coding: utf-8 -*-
+"""
+Ranges
+======
+
+This module compiles local geolocation database files (GeoLite2 ``.mmdb``
+created by MaxMind or IP2Location ``.BIN``) into flat in-memory range index.
+The index consists of sorted arrays of integer starts of IP address ranges,
+each pointing into deduplicated list of location rows, so that lookup of IP
+address is a single binary search returning
+:py:class:`ip2geotools.models.IpLocation` directly.
+
+Compiled index can be saved into snapshot file, which is loaded without any
+parsing: the file is memory-mapped and its fixed-width tables are used in
+place, so processes loading the same snapshot share its pages.
+
+"""
+import array
+import bisect
+import io
+import mmap
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+from ip2geotools.models import IpLocation, IpLocationBatch
+from ip2geotools.errors import IpAddressNotFoundError, InvalidRequestError
+
+
+IPV4_MAX = 2 ** 32 - 1
+IPV6_MAX = 2 ** 128 - 1
+
+# marker preceding metadata section of MaxMind DB file
+_MAXMIND_METADATA_MARKER = b'\xab\xcd\xefMaxMind.com'
+
+# positions of columns of country, region, city, latitude and longitude
+# (0 when missing) in IP2Location BIN database of given type (DB1 to DB25)
+_IP2LOCATION_COUNTRY_POSITION = (0, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2)
+_IP2LOCATION_REGION_POSITION = (0, 0, 0, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3)
+_IP2LOCATION_CITY_POSITION = (0, 0, 0, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4)
+_IP2LOCATION_LATITUDE_POSITION = (0, 0, 0, 0, 0, 5, 5, 0, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5)
+_IP2LOCATION_LONGITUDE_POSITION = (0, 0, 0, 0, 0, 6, 6, 0, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6)
+
+#: Magic bytes at the beginning of snapshot file.
+SNAPSHOT_MAGIC = b'IP2GSNAP'
+
+#: Version of snapshot file format.
+SNAPSHOT_VERSION = 1
+
+# magic, version, reserved and counts of items of sections (see _snapshot_layout)
+_SNAPSHOT_HEADER = struct.Struct('<8sII9Q')
+
+_LOCATION_FIELDS = ('city', 'region', 'country')
+
+_IPV4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+_6TO4_PREFIX = b'\x20\x02'
+
+
+def parse_ip_address(ip_address):
+    """
+    Return IP version (4 or 6) and integer value of given IP address.
+    IPv4-mapped and 6to4 IPv6 addresses are returned as the IPv4 addresses
+    they embed, as both GeoLite2 and IP2Location databases do.
+
+    """
+
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip_address), 'big')
+    except (OSError, TypeError, ValueError):
+        pass
+
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, ip_address)
+    except (OSError, TypeError, ValueError):
+        raise InvalidRequestError(ip_address)
+
+    if packed[:12] == _IPV4_MAPPED_PREFIX:
+        return 4, int.from_bytes(packed[12:], 'big')
+    elif packed[:2] == _6TO4_PREFIX:
+        return 4, int.from_bytes(packed[2:6], 'big')
+
+    return 6, int.from_bytes(packed, 'big')
+
+
+def _snapshot_layout(counts):
+    # sections of snapshot file as (name, typecode, offset, count), aligned to 8 bytes
+    ipv4_count, ipv6_count, location_count = counts[:3]
+    sections = [('starts4', 'I', ipv4_count),
+                ('rows4', 'i', ipv4_count),
+                ('starts6_high', 'Q', ipv6_count),
+                ('starts6_low', 'Q', ipv6_count),
+                ('rows6', 'i', ipv6_count)]
+    sections.extend((field, 'i', location_count) for field in _LOCATION_FIELDS)
+    sections.extend(((field, 'd', location_count) for field in ('latitude', 'longitude')))
+
+    for position, field in enumerate(_LOCATION_FIELDS):
+        string_count, string_size = counts[3 + 2 * position:5 + 2 * position]
+        sections.append((field + '_offsets', 'I', string_count + 1))
+        sections.append((field + '_strings', 'B', string_size))
+
+    layout = []
+    offset = _SNAPSHOT_HEADER.size
+
+    for name, typecode, count in sections:
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, typecode, offset, count))
+        offset += count * array.array(typecode).itemsize
+
+    return layout
+
+
+class RangeIndex(object):
+    """
+    In-memory range index of locations of IP addresses.
+
+    IPv4 ranges are stored as array of their starts (unsigned 32-bit) and
+    IPv6 ranges as two arrays of high and low 64 bits of their starts. Every
+    range points into :py:attr:`locations` (list of distinct tuples
+    ``(city, region, country, latitude, longitude)``) by row number, ``-1``
+    marks range without location. Starts of both versions begin at 0 and
+    cover the whole address space.
+
+    """
+
+    def __init__(self, starts4, rows4, starts6_high, starts6_low, rows6, locations):
+        self.starts4 = starts4
+        self.rows4 = rows4
+        self.starts6_high = starts6_high
+        self.starts6_low = starts6_low
+        self.rows6 = rows6
+        self.locations = locations
+        self._cached_columns = None
+
+    @classmethod
+    def open(cls, db_path):
+        """
+        Load range index from snapshot file or compile it from database file,
+        see :py:meth:`load` and :py:meth:`compile`.
+
+        """
+
+        with open(db_path, 'rb') as f:
+            magic = f.read(len(SNAPSHOT_MAGIC))
+
+        if magic == SNAPSHOT_MAGIC:
+            return cls.load(db_path)
+
+        return cls.compile(db_path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load range index from snapshot file saved by :py:meth:`save`. The file
+        is memory-mapped and its tables are used in place; strings are decoded
+        on first use. The mapping is released with the last reference to the
+        index.
+
+        """
+
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls._from_snapshot(data, path)
+
+    @classmethod
+    def _from_snapshot(cls, data, name):
+        # index using tables of snapshot in given buffer in place
+        if sys.byteorder != 'little':
+            raise ValueError('snapshots are supported only on little-endian platforms')
+
+        if len(data) < _SNAPSHOT_HEADER.size:
+            raise ValueError('%s is not a snapshot file' % name)
+
+        header = _SNAPSHOT_HEADER.unpack_from(data, 0)
+
+        if header[0] != SNAPSHOT_MAGIC:
+            raise ValueError('%s is not a snapshot file' % name)
+
+        if header[1] != SNAPSHOT_VERSION:
+            raise ValueError('%s is snapshot of unsupported version %d' % (name, header[1]))
+
+        view = memoryview(data)
+        sections = {}
+
+        for section, typecode, offset, count in _snapshot_layout(header[3:]):
+            end = offset + count * array.array(typecode).itemsize
+
+            if end > len(data):
+                raise ValueError('%s is truncated snapshot file' % name)
+
+            sections[section] = view[offset:end].cast(typecode)
+
+        return cls(sections['starts4'],
+                   sections['rows4'],
+                   sections['starts6_high'],
+                   sections['starts6_low'],
+                   sections['rows6'],
+                   _SnapshotLocations(sections))
+
+    def packed(self):
+        """
+        Return range index with the same ranges and locations stored in
+        layout of snapshot file in single in-memory buffer instead of Python
+        objects (the index itself when it is already packed). Packed index
+        takes less memory and, as there are no objects whose reference counts
+        change on lookups, its pages stay shared by processes forked after it
+        has been loaded.
+
+        """
+
+        if isinstance(self.locations, _SnapshotLocations):
+            return self
+
+        buffer = io.BytesIO()
+        self._write_snapshot(buffer)
+
+        return self._from_snapshot(buffer.getvalue(), 'packed index')
+
+    def save(self, path):
+        """
+        Save range index into snapshot file (replaced atomically).
+
+        """
+
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                self._write_snapshot(f)
+
+            os.replace(temporary_path, path)
+        except:
+            os.remove(temporary_path)
+            raise
+
+    def _write_snapshot(self, f):
+        codes = {field: array.array('i') for field in _LOCATION_FIELDS}
+        coordinates = {field: array.array('d') for field in ('latitude', 'longitude')}
+        pools = {field: ({}, array.array('I', [0]), bytearray()) for field in _LOCATION_FIELDS}
+        nan = float('nan')
+
+        for location in self.locations:
+            for position, field in enumerate(_LOCATION_FIELDS):
+                value = location[position]
+
+                if value is None:
+                    codes[field].append(-1)
+                    continue
+
+                indexes, offsets, strings = pools[field]
+                code = indexes.get(value)
+
+                if code is None:
+                    code = indexes[value] = len(offsets) - 1
+                    strings.extend(value.encode('utf-8'))
+                    offsets.append(len(strings))
+
+                codes[field].append(code)
+
+            for position, field in ((3, 'latitude'), (4, 'longitude')):
+                coordinates[field].append(nan if location[position] is None else location[position])
+
+        sections = {
+            'starts4': self.starts4,
+            'rows4': self.rows4,
+            'starts6_high': self.starts6_high,
+            'starts6_low': self.starts6_low,
+            'rows6': self.rows6,
+        }
+        sections.update(codes)
+        sections.update(coordinates)
+        counts = [len(self.starts4), len(self.starts6_high), len(self.locations)]
+
+        for field in _LOCATION_FIELDS:
+            _, offsets, strings = pools[field]
+            sections[field + '_offsets'] = offsets
+            sections[field + '_strings'] = strings
+            counts.extend((len(offsets) - 1, len(strings)))
+
+        f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, *counts))
+
+        for name, _, offset, _ in _snapshot_layout(counts):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(sections[name])
+
+    @classmethod
+    def compile(cls, db_path):
+        """
+        Compile range index from GeoLite2 (``.mmdb``) or IP2Location
+        (``.BIN``) database file. Type of database is detected from content
+        of the file.
+
+        """
+
+        builder = RangeIndexBuilder()
+
+        with open(db_path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if data.rfind(_MAXMIND_METADATA_MARKER, max(0, len(data) - 128 * 1024)) != -1:
+                builder.add_maxmind(db_path)
+            else:
+                builder.add_ip2location(data)
+        finally:
+            data.close()
+
+        return builder.build()
+
+    def _row6(self, value):
+        # binary search over starts split into high and low 64 bits
+        high, low = value >> 64, value & 0xffffffffffffffff
+        starts_high, starts_low = self.starts6_high, self.starts6_low
+        lo, hi = 0, len(starts_high)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if high < starts_high[mid] or (high == starts_high[mid] and low < starts_low[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+
+        return self.rows6[lo - 1]
+
+    def row(self, ip_address):
+        """
+        Return number of location row of given IP address (``-1`` when it has
+        no location).
+
+        """
+
+        version, value = parse_ip_address(ip_address)
+
+        if version == 4:
+            return self.rows4[bisect.bisect_right(self.starts4, value) - 1]
+
+        return self._row6(value)
+
+    def lookup(self, ip_address):
+        """
+        Return location of given IP address.
+
+        """
+
+        row = self.row(ip_address)
+
+        if row < 0:
+            raise IpAddressNotFoundError(ip_address)
+
+        return IpLocation(ip_address, *self.locations[row])
+
+    def _columns(self):
+        # numpy arrays of codes and coordinates of all location rows wrapping
+        # tables of packed index in place and sequences of distinct strings
+        columns = self._cached_columns
+
+        if columns is None:
+            columns = self._cached_columns = self.packed().locations.columns()
+
+        return columns
+
+    def _rows6_array(self, high, low):
+        import numpy
+
+        starts_high = numpy.frombuffer(self.starts6_high, dtype=numpy.uint64)
+        starts_low = numpy.frombuffer(self.starts6_low, dtype=numpy.uint64)
+
+        # starts with equal high 64 bits form runs sorted by low 64 bits
+        first = numpy.searchsorted(starts_high, high, side='left')
+        lo = first.copy()
+        hi = numpy.searchsorted(starts_high, high, side='right')
+        active = lo < hi
+
+        while active.any():
+            mid = (lo + hi) // 2
+            below = starts_low[numpy.minimum(mid, len(starts_low) - 1)] <= low
+            lo = numpy.where(active & below, mid + 1, lo)
+            hi = numpy.where(active & ~below, mid, hi)
+            active = lo < hi
+
+        rows = numpy.frombuffer(self.rows6, dtype=numpy.int32)[lo - 1]
+
+        # IPv4-mapped and 6to4 addresses are looked up as IPv4 addresses
+        mapped = (high == 0) & ((low >> numpy.uint64(32)) == 0xffff)
+        six_to_four = (high >> numpy.uint64(48)) == 0x2002
+
+        if mapped.any() or six_to_four.any():
+            ipv4 = numpy.where(mapped, low, high >> numpy.uint64(16)) & numpy.uint64(0xffffffff)
+            rows = numpy.where(mapped | six_to_four, self._rows4_array(ipv4.astype(numpy.uint32)), rows)
+
+        return rows
+
+    def _rows4_array(self, ipv4):
+        import numpy
+
+        starts4 = numpy.frombuffer(self.starts4, dtype=numpy.uint32)
+
+        return numpy.frombuffer(self.rows4, dtype=numpy.int32)[numpy.searchsorted(starts4, ipv4, side='right') - 1]
+
+    def lookup_arrays(self, ipv4=None, ipv6_high=None, ipv6_low=None):
+        """
+        Return :py:class:`ip2geotools.models.IpLocationBatch` of locations of
+        IPv4 addresses given as array of unsigned 32-bit integers followed by
+        IPv6 addresses given as arrays of their high and low 64 bits, resolved
+        by single vectorized search for each version (requires
+        :py:mod:`numpy`). IP addresses without location are included with all
+        fields set to ``None``. Codes and coordinates are gathered from tables
+        of packed index (see :py:meth:`packed`) wrapped by numpy arrays in
+        place, so they stay shared by forked processes; strings are decoded
+        only when accessed and IP addresses are formatted only when accessed.
+
+        """
+
+        import numpy
+
+        ipv4 = numpy.asarray(ipv4 if ipv4 is not None else [], dtype=numpy.uint32)
+        ipv6_high = numpy.asarray(ipv6_high if ipv6_high is not None else [], dtype=numpy.uint64)
+        ipv6_low = numpy.asarray(ipv6_low if ipv6_low is not None else [], dtype=numpy.uint64)
+
+        if ipv6_high.shape != ipv6_low.shape:
+            raise ValueError('arrays of high and low bits of IPv6 addresses differ in shape')
+
+        rows = numpy.concatenate((self._rows4_array(ipv4), self._rows6_array(ipv6_high, ipv6_low)))
+        codes, categories, latitude, longitude = self._columns()
+        missing = rows < 0
+        rows[missing] = 0
+
+        def gather(column, fill):
+            # values of rows with fill value for row number -1
+            if not len(column):
+                return numpy.full(len(rows), fill, dtype=column.dtype)
+
+            return numpy.where(missing, fill, column[rows])
+
+        return IpLocationBatch.from_columns(
+            PackedIpAddresses(ipv4, ipv6_high, ipv6_low),
+            {field: gather(field_codes, -1) for field, field_codes in codes.items()},
+            categories,
+            gather(latitude, numpy.nan),
+            gather(longitude, numpy.nan))
+
+    def __len__(self):
+        return len(self.starts4) + len(self.starts6_high)
+
+
+class _SnapshotLocations(object):
+    """
+    Read-only sequence of location rows of range index loaded from snapshot
+    file, decoding strings from string pools on first use.
+
+    """
+
+    def __init__(self, sections):
+        self._codes = [sections[field] for field in _LOCATION_FIELDS]
+        self._pools = [_StringPool(sections[field + '_offsets'], sections[field + '_strings'])
+                       for field in _LOCATION_FIELDS]
+        self._latitude = sections['latitude']
+        self._longitude = sections['longitude']
+
+    def __len__(self):
+        return len(self._latitude)
+
+    def _string(self, position, code):
+        if code < 0:
+            return None
+
+        return self._pools[position][code]
+
+    def columns(self):
+        """
+        Return dict of :py:mod:`numpy` arrays of codes of ``city``,
+        ``region`` and ``country`` of all rows, dict of sequences of their
+        distinct values and arrays of latitudes and longitudes. Arrays wrap
+        tables of the snapshot without copying them.
+
+        """
+
+        import numpy
+
+        codes = {field: numpy.frombuffer(column, dtype=numpy.int32)
+                 for field, column in zip(_LOCATION_FIELDS, self._codes)}
+
+        return (codes,
+                dict(zip(_LOCATION_FIELDS, self._pools)),
+                numpy.frombuffer(self._latitude, dtype=numpy.float64),
+                numpy.frombuffer(self._longitude, dtype=numpy.float64))
+
+    def __getitem__(self, row):
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+
+        latitude = self._latitude[row]
+        longitude = self._longitude[row]
+
+        return (self._string(0, self._codes[0][row]),
+                self._string(1, self._codes[1][row]),
+                self._string(2, self._codes[2][row]),
+                None if latitude != latitude else latitude,
+                None if longitude != longitude else longitude)
+
+
+class _StringPool(object):
+    """
+    Read-only sequence of strings of string pool of snapshot file, decoding
+    strings on first use.
+
+    """
+
+    def __init__(self, offsets, strings):
+        self._offsets = offsets
+        self._strings = strings
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, code):
+        if not 0 <= code < len(self):
+            raise IndexError(code)
+
+        value = self._decoded.get(code)
+
+        if value is None:
+            value = self._decoded[code] = bytes(
+                self._strings[self._offsets[code]:self._offsets[code + 1]]).decode('utf-8')
+
+        return value
+
+
+class PackedIpAddresses(object):
+    """
+    Read-only sequence of IP addresses formatted on access from arrays of
+    IPv4 addresses (unsigned 32-bit integers) followed by IPv6 addresses
+    (high and low 64 bits).
+
+    """
+
+    def __init__(self, ipv4, ipv6_high, ipv6_low):
+        self.ipv4 = ipv4
+        self.ipv6_high = ipv6_high
+        self.ipv6_low = ipv6_low
+
+    def __len__(self):
+        return len(self.ipv4) + len(self.ipv6_high)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        if index < len(self.ipv4):
+            return socket.inet_ntop(socket.AF_INET, int(self.ipv4[index]).to_bytes(4, 'big'))
+
+        index -= len(self.ipv4)
+        value = (int(self.ipv6_high[index]) << 64) | int(self.ipv6_low[index])
+
+        return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, 'big'))
+
+
+class RangeIndexBuilder(object):
+    """
+    Builder of :py:class:`RangeIndex` from ranges of IP addresses added in any
+    order. Overlapping parts of ranges are kept from the range starting first,
+    adjacent ranges with the same location are merged.
+
+    """
+
+    def __init__(self):
+        self._ranges = {4: [], 6: []}
+        self._rows = {}
+        self._strings = {}
+        self.locations = []
+
+    def _row(self, location):
+        row = self._rows.get(location)
+
+        if row is None:
+            # share equal strings among locations
+            location = tuple(self._strings.setdefault(value, value) if isinstance(value, str) else value
+                             for value in location)
+            row = self._rows[location] = len(self.locations)
+            self.locations.append(location)
+
+        return row
+
+    def add(self, version, first, last, location):
+        """
+        Add range of IP addresses of given version from ``first`` to ``last``
+        (integers, inclusive) located at ``location`` (tuple ``(city, region,
+        country, latitude, longitude)``, or ``None`` for no location).
+
+        """
+
+        row = -1 if location is None else self._row(location)
+        self._ranges[version].append((first, last, row))
+
+    def add_maxmind(self, db_path):
+        """
+        Add all networks of GeoLite2 database file.
+
+        """
+
+        import maxminddb
+
+        reader = maxminddb.open_database(db_path)
+
+        try:
+            for network, record in reader:
+                self.add(network.version,
+                         int(network.network_address),
+                         int(network.broadcast_address),
+                         self._maxmind_location(record))
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _maxmind_location(record):
+        if not record:
+            return None
+
+        country = (record.get('country') or {}).get('iso_code')
+        subdivisions = record.get('subdivisions')
+        region = subdivisions[0].get('names', {}).get('en') if subdivisions else None
+        city = (record.get('city') or {}).get('names', {}).get('en')
+        location = record.get('location') or {}
+
+        return (city, region, country, location.get('latitude'), location.get('longitude'))
+
+    def add_ip2location(self, data):
+        """
+        Add all ranges of IP2Location BIN database given as bytes-like object.
+        Ranges with unknown country (``-``) are added without location.
+
+        """
+
+        (db_type, db_column, _, _, _,
+         ipv4_count, ipv4_base, ipv6_count, ipv6_base) = struct.unpack_from('<5B4I', data, 0)
+        strings = {}
+
+        def string(offset, position):
+            if not position:
+                return None
+
+            pointer = struct.unpack_from('<I', data, offset + position * 4)[0]
+            value = strings.get(pointer)
+
+            if value is None:
+                value = bytes(data[pointer + 1:pointer + 1 + data[pointer]]).decode('utf-8', 'replace')
+                strings[pointer] = value
+
+            return value
+
+        def coordinate(offset, position):
+            if not position:
+                return None
+
+            return round(struct.unpack_from('<f', data, offset + position * 4)[0], 6)
+
+        # newer database types share positions of these columns with DB25
+        db_type = min(db_type, len(_IP2LOCATION_COUNTRY_POSITION) - 1)
+
+        for version, count, base, address_size in ((4, ipv4_count, ipv4_base, 4),
+                                                   (6, ipv6_count, ipv6_base, 16)):
+            if not count:
+                continue
+
+            row_size = address_size + (db_column - 1) * 4
+            base -= 1
+            # starts of following ranges, row ``count`` holds end of the last one
+            starts = [int.from_bytes(data[base + i * row_size:base + i * row_size + address_size], 'little')
+                      for i in range(count + 1)]
+
+            for i in range(count):
+                # column at position N (the first one being IP address) starts at offset + N * 4
+                offset = base + i * row_size + address_size - 8
+                country = string(offset, _IP2LOCATION_COUNTRY_POSITION[db_type])
+
+                if country is None or country == '-':
+                    location = None
+                else:
+                    location = (string(offset, _IP2LOCATION_CITY_POSITION[db_type]),
+                                string(offset, _IP2LOCATION_REGION_POSITION[db_type]),
+                                country,
+                                coordinate(offset, _IP2LOCATION_LATITUDE_POSITION[db_type]),
+                                coordinate(offset, _IP2LOCATION_LONGITUDE_POSITION[db_type]))
+
+                self.add(version, starts[i], max(starts[i], starts[i + 1] - 1), location)
+
+    def build(self):
+        """
+        Return compiled :py:class:`RangeIndex`.
+
+        """
+
+        compiled = {}
+
+        for version, maximum in ((4, IPV4_MAX), (6, IPV6_MAX)):
+            starts, rows = [], []
+            following = 0
+
+            for first, last, row in sorted(self._ranges[version]):
+                if last < following:
+                    continue
+
+                first = max(first, following)
+
+                if first > following and (not rows or rows[-1] != -1):
+                    starts.append(following)
+                    rows.append(-1)
+
+                if not rows or rows[-1] != row:
+                    starts.append(first)
+                    rows.append(row)
+
+                following = last + 1
+
+            if following <= maximum and (not rows or rows[-1] != -1):
+                starts.append(following)
+                rows.append(-1)
+
+            compiled[version] = (starts, array.array('i', rows))
+
+        starts4, rows4 = compiled[4]
+        starts6, rows6 = compiled[6]
+
+        return RangeIndex(array.array('I', starts4),
+                          rows4,
+                          array.array('Q', [start >> 64 for start in starts6]),
+                          array.array('Q', [start & 0xffffffffffffffff for start in starts6]),
+                          rows6,
+                          self.locations)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Scraping
+========
+
+Helpers for extracting geolocation data from HTML pages of databases without
+an API. Result tables are walked only once, instead of running separate
+selector query over the whole document for every field.
+
+"""
+
+
+def _tag(element):
+    # tag name without namespace; comments and processing instructions have none
+    tag = element.tag
+    return tag.rpartition('}')[2] if isinstance(tag, str) else None
+
+
+def _text(element):
+    return ' '.join(''.join(element.itertext()).split())
+
+
+def parse_table(*tables):
+    """
+    Walk rows of given tables (:py:mod:`lxml` elements, e.g. from
+    :py:class:`pyquery.PyQuery`) once and return dict mapping labels in first
+    cell of a row (stripped of trailing colon) to whitespace-normalized text
+    of remaining cells. The first row with given label wins.
+
+    """
+
+    data = {}
+
+    for table in tables:
+        for row in table.iter():
+            if _tag(row) != 'tr':
+                continue
+
+            cells = [cell for cell in row if _tag(cell) in ('th', 'td')]
+
+            if not cells:
+                continue
+
+            label = _text(cells[0]).rstrip(':').rstrip()
+
+            if label not in data:
+                data[label] = ' '.join(_text(cell) for cell in cells[1:])
+
+    return data
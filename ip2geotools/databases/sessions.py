@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Sessions
+========
+
+This module manages HTTP sessions used for accessing online geolocation
+databases. Every provider gets its own :py:class:`requests.Session` with
+a pool of keep-alive connections, so repeated lookups against the same
+provider reuse already established (TCP and TLS) connections.
+
+Asynchronous lookups use one :py:class:`aiohttp.ClientSession` per provider
+and event loop instead, with number of simultaneous connections limited by
+:py:data:`ASYNC_POOL_LIMIT`. ``aiohttp`` is an optional dependency needed only
+for asynchronous lookups.
+
+"""
+import threading
+import weakref
+
+
+#: Number of connections kept alive per host of a provider.
+POOL_MAXSIZE = 16
+
+#: Number of simultaneous connections to a provider for asynchronous lookups.
+ASYNC_POOL_LIMIT = 64
+
+_sessions = {}
+_lock = threading.Lock()
+_pool_maxsize = POOL_MAXSIZE
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def create_session():
+    """
+    Create new session with pooled keep-alive connections.
+
+    """
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4,
+                          pool_maxsize=_pool_maxsize,
+                          pool_block=False)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+
+def set_pool_maxsize(maxsize):
+    """
+    Set number of connections kept alive per host of sessions created from
+    now on (:py:data:`POOL_MAXSIZE` by default). It should not be lower than
+    number of threads making requests to the same provider, otherwise
+    connections above it are discarded after every request.
+
+    """
+
+    global _pool_maxsize  # pylint: disable=global-statement
+
+    _pool_maxsize = maxsize
+
+
+def get_session(provider):
+    """
+    Return session for given provider (usually a database class), creating
+    it on first use.
+
+    """
+
+    session = _sessions.get(provider)
+
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+
+            if session is None:
+                session = create_session()
+                _sessions[provider] = session
+
+    return session
+
+
+def set_session(provider, session):
+    """
+    Use given session (e.g. with custom proxies, headers or adapters) for all
+    requests to given provider. Passing ``None`` restores the default session.
+
+    """
+
+    with _lock:
+        if session is None:
+            _sessions.pop(provider, None)
+        else:
+            _sessions[provider] = session
+
+
+def close_sessions():
+    """
+    Close all sessions and their pooled connections.
+
+    """
+
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+
+    for session in sessions:
+        session.close()
+
+
+class AsyncResponse(object):
+    """
+    Response of asynchronous request providing the same attributes as
+    :py:class:`requests.Response` used by the databases.
+
+    """
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+
+def create_async_session():
+    """
+    Create new asynchronous session for current event loop.
+
+    """
+
+    import aiohttp
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=ASYNC_POOL_LIMIT))
+
+
+def get_async_session(provider):
+    """
+    Return asynchronous session for given provider and current event loop,
+    creating it on first use.
+
+    """
+
+    import asyncio
+
+    sessions = _async_sessions.setdefault(asyncio.get_event_loop(), {})
+    session = sessions.get(provider)
+
+    if session is None or session.closed:
+        session = create_async_session()
+        sessions[provider] = session
+
+    return session
+
+
+def set_async_session(provider, session):
+    """
+    Use given :py:class:`aiohttp.ClientSession` for all asynchronous requests
+    to given provider made from current event loop. Passing ``None`` restores
+    the default session.
+
+    """
+
+    import asyncio
+
+    sessions = _async_sessions.setdefault(asyncio.get_event_loop(), {})
+
+    if session is None:
+        sessions.pop(provider, None)
+    else:
+        sessions[provider] = session
+
+
+async def close_async_sessions():
+    """
+    Close all asynchronous sessions of current event loop.
+
+    """
+
+    import asyncio
+
+    sessions = _async_sessions.pop(asyncio.get_event_loop(), {})
+
+    for session in sessions.values():
+        await session.close()
+
+
+async def async_request(provider, method, url, timeout=None, auth=None, **kwargs):
+    """
+    Make asynchronous HTTP request using session of given provider. Arguments
+    follow :py:meth:`requests.Session.request`.
+
+    """
+
+    import aiohttp
+
+    if auth is not None:
+        auth = aiohttp.BasicAuth(*auth)
+
+    if timeout is not None:
+        timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with get_async_session(provider).request(method, url,
+                                                   timeout=timeout,
+                                                   auth=auth,
+                                                   **kwargs) as response:
+        return AsyncResponse(response.status, await response.read())
@@ -9,35 +9,47 @@ third-party geolocation databases.
 """
 # pylint: disable=missing-docstring
 
-import json
-import dicttoxml
+import collections
+
+from ip2geotools import formats
 
 
 class LocationError(RuntimeError):
     """
     This class represents a generic location error. It extends
-    :py:exc:`RuntimeError` and does not add any additional attributes.
+    :py:exc:`RuntimeError` and adds the following attribute:
+
+    .. attribute:: ip_address
+
+      IP address whose location could not be got, ``None`` when unknown
+      (bulk lookups from command line set it for every error). It is
+      included in output data formats only when it is set.
 
     """
 
+    _xml_element = 'ip_location_error'
+
+    ip_address = None
+
+    def to_dict(self):
+        fields = collections.OrderedDict()
+
+        if self.ip_address is not None:
+            fields['ip_address'] = self.ip_address
+
+        fields['error_type'] = type(self).__name__
+        fields['error_message'] = self.__str__()
+
+        return fields
+
     def to_json(self):
-        return json.dumps(
-            {
-                'error_type': type(self).__name__,
-                'error_message': self.__str__()
-            })
+        return formats.to_json(self)
 
     def to_xml(self):
-        return dicttoxml.dicttoxml(
-            {
-                'error_type': type(self).__name__,
-                'error_message': self.__str__()
-            },
-            custom_root='ip_location_error',
-            attr_type=False).decode()
+        return formats.to_xml(self)
 
     def to_csv(self, delimiter):
-        return '%s%s%s' % (type(self).__name__, delimiter, self.__str__())
+        return formats.to_csv(self, delimiter)
 
 
 class IpAddressNotFoundError(LocationError):
@@ -93,3 +105,4 @@ class LimitExceededError(LocationError):
     """
 
     pass
+
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Formats
+=======
+
+These functions serialize locations (:py:class:`ip2geotools.models.IpLocation`)
+and location errors (:py:class:`ip2geotools.errors.LocationError`) into output
+data formats. Any object providing method ``to_dict`` returning its fields in
+output order (as :py:class:`collections.OrderedDict`, since order of plain
+dicts is not guaranteed before Python 3.7) can be serialized; CSV and msgpack
+use values of method ``to_tuple`` instead when it is provided.
+
+JSON is encoded by :py:mod:`orjson` when it is installed (imported on first
+use), otherwise by :py:mod:`json` with the same output, i.e. compact (without
+spaces after separators) and with non-ASCII characters written as they are.
+XML elements are named by attribute ``_xml_element`` of serialized objects.
+CSV is written by :py:mod:`csv` (empty field stands for ``None``).
+
+Binary msgpack format is a stream of msgpack arrays, one per location
+(``[MSGPACK_LOCATION, ip_address, city, region, country, latitude,
+longitude]``) or location error (``[MSGPACK_ERROR, ip_address, error_type,
+error_message]``); it is read by :py:func:`read_msgpack`.
+:py:mod:`msgpack` is an optional dependency needed only for this format.
+
+"""
+import csv
+import io
+import itertools
+import json
+
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" ?>'
+
+#: Separators of JSON encoded by :py:mod:`json` (as in output of :py:mod:`orjson`).
+JSON_SEPARATORS = (',', ':')
+
+#: Number of CSV rows formatted in memory before being written into file.
+CSV_BUFFER_ROWS = 1024
+
+#: Type code of msgpack record of location.
+MSGPACK_LOCATION = 0
+
+#: Type code of msgpack record of location error.
+MSGPACK_ERROR = 1
+
+#: Number of msgpack records packed in memory before being written into file.
+MSGPACK_BUFFER_RECORDS = 1024
+
+# escaped special characters and removed characters not allowed in XML 1.0 documents
+_XML_ESCAPES = {ord('&'): '&amp;', ord('<'): '&lt;', ord('>'): '&gt;'}
+_XML_ESCAPES.update((code, None) for code in itertools.chain(range(0x00, 0x09), (0x0b, 0x0c),
+                                                             range(0x0e, 0x20), (0xfffe, 0xffff)))
+
+# orjson module (None when it is not installed), imported on first use
+_orjson = False
+
+
+def _get_orjson():
+    global _orjson  # pylint: disable=global-statement
+
+    if _orjson is False:
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+
+        _orjson = orjson
+
+    return _orjson
+
+
+def json_dumps(value):
+    """
+    Return given value encoded by :py:mod:`json` as compact JSON, same as
+    encoded by :py:mod:`orjson`.
+
+    """
+
+    return json.dumps(value, separators=JSON_SEPARATORS, ensure_ascii=False)
+
+
+def _write_function(file):
+    # text is encoded when writing into binary file
+    if isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+        return lambda text: file.write(text.encode('utf-8'))
+
+    return file.write
+
+
+def _values(value):
+    # field values in output order
+    to_tuple = getattr(value, 'to_tuple', None)
+
+    if to_tuple is not None:
+        return to_tuple()
+
+    return tuple(value.to_dict().values())
+
+
+def to_json(value):
+    """
+    Return given location or location error as JSON object.
+
+    """
+
+    orjson = _get_orjson()
+
+    if orjson is not None:
+        return orjson.dumps(value.to_dict()).decode('utf-8')
+
+    return json_dumps(value.to_dict())
+
+
+def json_value(value):
+    """
+    Return given value (e.g. single field of location) encoded as JSON by
+    the same encoder as :py:func:`to_json`.
+
+    """
+
+    orjson = _get_orjson()
+
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+
+    return json_dumps(value)
+
+
+def write_json_lines(values, file):
+    """
+    Write given locations or location errors into given text or binary file
+    in JSON Lines format, i.e. one JSON object per line, and return number of
+    written lines. Values are consumed and written one by one, so any
+    iterable (e.g. results of ``get_many``) can be streamed.
+
+    """
+
+    orjson = _get_orjson()
+    count = 0
+
+    if orjson is not None and isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+        # bytes from orjson are written as they are
+        for value in values:
+            file.write(orjson.dumps(value.to_dict(), option=orjson.OPT_APPEND_NEWLINE))
+            count += 1
+    elif isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+        for value in values:
+            file.write(json_dumps(value.to_dict()).encode('utf-8'))
+            file.write(b'\n')
+            count += 1
+    else:
+        write = _write_function(file)
+
+        for value in values:
+            write(to_json(value) + '\n')
+            count += 1
+
+    return count
+
+
+def _xml_text(value):
+    if value is None:
+        return ''
+
+    return str(value).translate(_XML_ESCAPES)
+
+
+def _xml_element(value):
+    # pylint: disable=protected-access
+    return '<{0}>{1}</{0}>'.format(
+        value._xml_element,
+        ''.join('<{0}>{1}</{0}>'.format(name, _xml_text(field))
+                for name, field in value.to_dict().items()))
+
+
+def to_xml(value):
+    """
+    Return given location or location error as XML document.
+
+    """
+
+    return XML_DECLARATION + _xml_element(value)
+
+
+def write_xml(values, file, root='ip_locations'):
+    """
+    Write given locations or location errors into given text or binary file
+    as single XML document with given root element and return number of
+    written elements. Values are consumed and written one by one, so any
+    iterable (e.g. results of ``get_many``) can be streamed.
+
+    """
+
+    write = _write_function(file)
+    count = 0
+
+    write('{0}\n<{1}>\n'.format(XML_DECLARATION, root))
+
+    for value in values:
+        write(_xml_element(value) + '\n')
+        count += 1
+
+    write('</{0}>\n'.format(root))
+
+    return count
+
+
+def _csv_writer(file, delimiter):
+    return csv.writer(file, delimiter=delimiter, lineterminator='\n')
+
+
+def to_csv(value, delimiter):
+    """
+    Return given location or location error as CSV row (without line
+    terminator) separated by given delimiter.
+
+    """
+
+    buffer = io.StringIO()
+    _csv_writer(buffer, delimiter).writerow(_values(value))
+
+    return buffer.getvalue()[:-1]
+
+
+def write_csv_rows(rows, file, delimiter=',', header=False):
+    """
+    Write given rows of values into given text or binary file in CSV format
+    separated by given delimiter, optionally preceded by header row with
+    names of attributes of :py:class:`ip2geotools.models.IpLocation`, and
+    return number of written rows (without header). Rows are formatted in
+    chunks of :py:data:`CSV_BUFFER_ROWS` rows written at once.
+
+    """
+
+    write = _write_function(file)
+    buffer = io.StringIO()
+    writer = _csv_writer(buffer, delimiter)
+    rows = iter(rows)
+    count = 0
+
+    if header:
+        from ip2geotools.models import IpLocation
+        writer.writerow(IpLocation.__slots__)
+
+    while True:
+        chunk = list(itertools.islice(rows, CSV_BUFFER_ROWS))
+        writer.writerows(chunk)
+        count += len(chunk)
+
+        if buffer.tell():
+            write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+
+        if len(chunk) < CSV_BUFFER_ROWS:
+            break
+
+    return count
+
+
+def write_csv(values, file, delimiter=',', header=False):
+    """
+    Write given locations or location errors (e.g. results of ``get_many``)
+    into given text or binary file in CSV format separated by given
+    delimiter, see :py:func:`write_csv_rows`.
+
+    """
+
+    return write_csv_rows((_values(value) for value in values),
+                          file, delimiter, header)
+
+
+def write_msgpack(values, file):
+    """
+    Write given locations or location errors (e.g. results of ``get_many``)
+    into given binary file in msgpack format and return number of written
+    records. Records are packed in chunks of :py:data:`MSGPACK_BUFFER_RECORDS`
+    records written at once.
+
+    """
+
+    import msgpack
+    from ip2geotools.errors import LocationError
+
+    packer = msgpack.Packer(use_bin_type=True, autoreset=False)
+    count = 0
+
+    for value in values:
+        if isinstance(value, LocationError):
+            packer.pack((MSGPACK_ERROR, value.ip_address, type(value).__name__, value.__str__()))
+        else:
+            packer.pack((MSGPACK_LOCATION,) + _values(value))
+
+        count += 1
+
+        if not count % MSGPACK_BUFFER_RECORDS:
+            file.write(packer.bytes())
+            packer.reset()
+
+    file.write(packer.bytes())
+
+    return count
+
+
+def read_msgpack(file):
+    """
+    Yield locations (:py:class:`ip2geotools.models.IpLocation`) and location
+    errors read from given binary file in msgpack format written by
+    :py:func:`write_msgpack`.
+
+    """
+
+    import msgpack
+    from ip2geotools import errors
+    from ip2geotools.models import IpLocation
+
+    for record in msgpack.Unpacker(file, raw=False, use_list=False):
+        if record[0] == MSGPACK_ERROR:
+            error_class = getattr(errors, record[2], None)
+
+            if not isinstance(error_class, type) or not issubclass(error_class, errors.LocationError):
+                error_class = errors.LocationError
+
+            error = error_class(*[record[3]] if record[3] else [])
+            error.ip_address = record[1]
+
+            yield error
+        else:
+            yield IpLocation(*record[1:])
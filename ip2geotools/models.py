@@ -9,8 +9,11 @@ and these models are also used for comparison of given and provided data.
 """
 # pylint: disable=missing-docstring
 
-import json
-import dicttoxml
+import array
+import collections
+import io
+
+from ip2geotools import formats
 
 
 class IpLocation(object):
@@ -45,12 +48,9 @@ class IpLocation(object):
 
     """
 
-    _ip_address = None
-    _city = None
-    _region = None
-    _country = None
-    _latitude = None
-    _longitude = None
+    __slots__ = ('ip_address', 'city', 'region', 'country', 'latitude', 'longitude')
+
+    _xml_element = 'ip_location'
 
     def __init__(self, ip_address, city=None, region=None, country=None,
                  latitude=None, longitude=None):
@@ -61,64 +61,36 @@ class IpLocation(object):
         self.latitude = latitude
         self.longitude = longitude
 
-    @property
-    def ip_address(self):
-        return self._ip_address
-
-    @ip_address.setter
-    def ip_address(self, value):
-        self._ip_address = value
-
-    @property
-    def city(self):
-        return self._city
-
-    @city.setter
-    def city(self, value):
-        self._city = value
-
-    @property
-    def region(self):
-        return self._region
+    @classmethod
+    def from_tuple(cls, values):
+        """
+        Create location from tuple of values ordered as :py:meth:`to_tuple`.
 
-    @region.setter
-    def region(self, value):
-        self._region = value
+        """
 
-    @property
-    def country(self):
-        return self._country
+        return cls(*values)
 
-    @country.setter
-    def country(self, value):
-        self._country = value
+    def to_tuple(self):
+        """
+        Return values of all attributes as tuple ordered as ``__slots__``,
+        i.e. compact representation of the location.
 
-    @property
-    def latitude(self):
-        return self._latitude
+        """
 
-    @latitude.setter
-    def latitude(self, value):
-        self._latitude = value
+        return (self.ip_address, self.city, self.region, self.country,
+                self.latitude, self.longitude)
 
-    @property
-    def longitude(self):
-        return self._longitude
-
-    @longitude.setter
-    def longitude(self, value):
-        self._longitude = value
+    def to_dict(self):
+        return collections.OrderedDict(zip(self.__slots__, self.to_tuple()))
 
     def to_json(self):
-        return json.dumps(self.__dict__).replace('"_', '"')
+        return formats.to_json(self)
 
     def to_xml(self):
-        return dicttoxml.dicttoxml(self.__dict__,
-                                   custom_root='ip_location',
-                                   attr_type=False).decode().replace('<_', '<').replace('</_', '</')
+        return formats.to_xml(self)
 
     def to_csv(self, delimiter):
-        return delimiter.join(self.__str__().split('\n'))
+        return formats.to_csv(self, delimiter)
 
     def __str__(self):
         return '{ip_address}\n{city}\n{region}\n{country}\n{latitude}\n{longitude}'.format(
@@ -135,3 +107,275 @@ class IpLocation(object):
             class_name=self.__class__.__name__,
             data=self.ip_address)
 
+
+class IpLocationBatch(object):
+    """
+    Columnar model for storing locations of many IP addresses.
+
+    Values of ``city``, ``region`` and ``country`` are dictionary-encoded,
+    i.e. every distinct value is stored once and rows refer to it by code
+    (``-1`` stands for ``None``). Latitudes and longitudes are stored in
+    contiguous arrays of doubles (``NaN`` stands for ``None``), which are
+    exposed as :py:mod:`numpy` arrays without copying when it is installed.
+    Coordinates given as other numbers than floats (e.g. integers) are also
+    kept as they are, so that batch is formatted the same as its locations.
+
+    Batch is immutable; it can be indexed and iterated like a list of
+    :py:class:`IpLocation`.
+
+    """
+
+    __slots__ = ('_ip_address', '_codes', '_categories', '_latitude', '_longitude', '_exact')
+
+    _encoded = ('city', 'region', 'country')
+
+    def __init__(self, ip_locations=()):
+        self._ip_address = []
+        self._codes = {field: array.array('i') for field in self._encoded}
+        self._categories = {field: [] for field in self._encoded}
+        self._latitude = array.array('d')
+        self._longitude = array.array('d')
+        self._exact = {'latitude': {}, 'longitude': {}}
+
+        indexes = {field: {} for field in self._encoded}
+        nan = float('nan')
+
+        for index, ip_location in enumerate(ip_locations):
+            self._ip_address.append(ip_location.ip_address)
+
+            for field in self._encoded:
+                value = getattr(ip_location, field)
+
+                if value is None:
+                    code = -1
+                else:
+                    code = indexes[field].get(value)
+
+                    if code is None:
+                        code = indexes[field][value] = len(self._categories[field])
+                        self._categories[field].append(value)
+
+                self._codes[field].append(code)
+
+            for field, values in (('latitude', self._latitude), ('longitude', self._longitude)):
+                value = getattr(ip_location, field)
+
+                if value is not None and type(value) is not float:
+                    self._exact[field][index] = value
+
+                values.append(nan if value is None else float(value))
+
+    @classmethod
+    def from_columns(cls, ip_addresses, codes, categories, latitude, longitude):
+        """
+        Create batch from columns without copying them: sequence of IP
+        addresses, dicts mapping ``city``, ``region`` and ``country`` to arrays
+        of codes (32-bit integers, ``-1`` for ``None``) and to sequences of
+        their distinct values, and arrays of latitudes and longitudes (doubles,
+        ``NaN`` for ``None``). Arrays may be :py:mod:`numpy` arrays.
+
+        """
+
+        batch = cls.__new__(cls)
+        batch._ip_address = ip_addresses
+        batch._codes = codes
+        batch._categories = categories
+        batch._latitude = latitude
+        batch._longitude = longitude
+        batch._exact = {'latitude': {}, 'longitude': {}}
+
+        return batch
+
+    def __len__(self):
+        return len(self._ip_address)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return IpLocationBatch(self[i] for i in range(*index.indices(len(self))))
+
+        if index < 0:
+            index += len(self)
+
+        return IpLocation(self._ip_address[index],
+                          *[self._decode(field, int(self._codes[field][index])) for field in self._encoded],
+                          latitude=self._coordinate('latitude', index),
+                          longitude=self._coordinate('longitude', index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _decode(self, field, code):
+        return None if code < 0 else self._categories[field][code]
+
+    def _coordinate(self, field, index):
+        value = self._exact[field].get(index)
+
+        if value is None:
+            value = float(getattr(self, '_' + field)[index])
+
+            if value != value:
+                value = None
+
+        return value
+
+    def _coordinates(self, field):
+        values = [None if value != value else value for value in getattr(self, '_' + field).tolist()]
+
+        for index, value in self._exact[field].items():
+            values[index] = value
+
+        return values
+
+    def codes(self, field):
+        """
+        Return codes of values of given dictionary-encoded field (``city``,
+        ``region`` or ``country``) and list of its distinct values.
+
+        """
+
+        return self._codes[field], self._categories[field]
+
+    def column(self, field):
+        """
+        Return all values of given field. Latitudes and longitudes are
+        returned as :py:mod:`numpy` array sharing memory with the batch (or
+        as :py:class:`array.array` when numpy is not installed), other fields
+        as list.
+
+        """
+
+        if field in ('latitude', 'longitude'):
+            values = getattr(self, '_' + field)
+
+            try:
+                import numpy
+            except ImportError:
+                return values
+
+            return numpy.frombuffer(values, dtype=numpy.float64)
+        elif field == 'ip_address':
+            return list(self._ip_address)
+
+        return [self._decode(field, code) for code in self._codes[field].tolist()]
+
+    def _formatted(self, encode, none):
+        # every distinct value is encoded only once (when it is used)
+        columns = [[encode(ip_address) for ip_address in self._ip_address]]
+
+        for field in self._encoded:
+            categories = self._categories[field]
+            encoded = {-1: none}
+            column = []
+
+            for code in self._codes[field].tolist():
+                if code not in encoded:
+                    encoded[code] = encode(categories[code])
+
+                column.append(encoded[code])
+
+            columns.append(column)
+
+        for field in ('latitude', 'longitude'):
+            columns.append([none if value is None else encode(value) for value in self._coordinates(field)])
+
+        return zip(*columns)
+
+    @staticmethod
+    def _write(lines, file):
+        if file is None:
+            return '\n'.join(lines)
+
+        for line in lines:
+            file.write(line)
+            file.write('\n')
+
+        return None
+
+    def to_json(self, file=None):
+        """
+        Return locations in JSON Lines format (one JSON object per line) or
+        write them into given text file.
+
+        """
+
+        template = '{{"ip_address":{},"city":{},"region":{},"country":{},' \
+                   '"latitude":{},"longitude":{}}}'
+
+        return self._write((template.format(*row)
+                            for row in self._formatted(formats.json_value, 'null')),
+                           file)
+
+    def to_csv(self, delimiter, file=None, header=False):
+        """
+        Return locations in CSV format separated by given delimiter (one
+        location per line, same as :py:meth:`IpLocation.to_csv`), optionally
+        preceded by header row, or write them into given text or binary file.
+
+        """
+
+        rows = self._formatted(lambda value: value, None)
+
+        if file is None:
+            file = io.StringIO()
+            formats.write_csv_rows(rows, file, delimiter, header)
+
+            return file.getvalue()[:-1]
+
+        formats.write_csv_rows(rows, file, delimiter, header)
+
+        return None
+
+    def to_pandas(self):
+        """
+        Return :py:class:`pandas.DataFrame` with dictionary-encoded fields as
+        categorical columns. IP addresses, codes and distinct values are
+        copied into the data frame, latitudes and longitudes share memory
+        with the batch.
+
+        """
+
+        import pandas
+
+        data = collections.OrderedDict()
+        data['ip_address'] = list(self._ip_address)
+
+        for field in self._encoded:
+            data[field] = pandas.Categorical.from_codes(self._codes[field],
+                                                        list(self._categories[field]))
+
+        data['latitude'] = self.column('latitude')
+        data['longitude'] = self.column('longitude')
+
+        return pandas.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """
+        Return :py:class:`pyarrow.Table` with dictionary-encoded fields as
+        dictionary arrays. IP addresses, codes and distinct values are copied
+        into the table, latitudes and longitudes share memory with the batch.
+
+        """
+
+        import pyarrow
+
+        columns = [pyarrow.array(list(self._ip_address), pyarrow.string())]
+
+        for field in self._encoded:
+            columns.append(pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array([None if code < 0 else code for code in self._codes[field]],
+                              pyarrow.int32()),
+                pyarrow.array(list(self._categories[field]), pyarrow.string())))
+
+        for values in (self._latitude, self._longitude):
+            columns.append(pyarrow.Array.from_buffers(pyarrow.float64(), len(values),
+                                                      [None, pyarrow.py_buffer(values)]))
+
+        return pyarrow.Table.from_arrays(columns, names=['ip_address'] + list(self._encoded)
+                                         + ['latitude', 'longitude'])
+
+    def __repr__(self):
+        return '{module}.{class_name}({data})'.format(
+            module=self.__module__,
+            class_name=self.__class__.__name__,
+            data=len(self))
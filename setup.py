@@ -27,10 +27,17 @@ setup(
     author_email=ip2geotools.__author_email__,
     url=ip2geotools.__url__,
     download_url=ip2geotools.__url__ + '/archive/' + ip2geotools.__version__ + '.tar.gz',
-    packages=find_packages(exclude=['docs', 'tests', 'tests.*']),
+    packages=find_packages(exclude=['docs', 'tests', 'tests.*', 'benchmarks']),
     package_data={'': ['LICENSE']},
     package_dir={'ip2geotools': 'ip2geotools'},
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.3'],
+        'json': ['orjson>=3'],
+        'msgpack': ['msgpack>=0.6'],
+        'numpy': ['numpy>=1.13'],
+    },
+    python_requires='>=3.5',
     include_package_data=True,
     test_suite="tests",
     license=ip2geotools.__license__,
@@ -44,8 +51,6 @@ setup(
         'Natural Language :: English',
         'Operating System :: POSIX :: Linux',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
         'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3 :: Only',
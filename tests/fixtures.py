@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic database files used by tests.
+
+"""
+import random
+import struct
+
+
+#: Locations of sample database as (country, region, city, latitude, longitude).
+LOCATIONS = [
+    ('CZ', 'South Moravian', 'Brno', 49.195, 16.608),
+    ('US', 'California', 'Mountain View', 37.386, -122.0838),
+    ('DE', 'Berlin', 'Berlin', 52.52, 13.405),
+    ('-', '-', '-', 0.0, 0.0),
+]
+
+
+def write_ip2location_db5(path, ranges4, ranges6=()):
+    """
+    Write IP2Location DB5 (country, region, city, latitude, longitude) BIN
+    file with given IPv4 and IPv6 ranges, each given as its first IP address
+    (integer) followed by fields of its location; the first range of each IP
+    version must start at 0. Country ``'-'`` stands for no location.
+
+    """
+
+    columns = 6
+    header_size = 64
+    ranges4 = list(ranges4)
+    ranges6 = list(ranges6)
+    base4 = header_size
+    base6 = base4 + (len(ranges4) + 1) * columns * 4
+    strings_base = base6 + ((len(ranges6) + 1) * (columns * 4 + 12) if ranges6 else 0)
+    strings = bytearray()
+    positions = {}
+
+    def string(*values):
+        if values not in positions:
+            positions[values] = strings_base + len(strings)
+
+            for value in values:
+                encoded = value.encode('utf-8')
+                strings.extend(bytes([len(encoded)]) + encoded)
+
+        return positions[values]
+
+    tables = []
+
+    for ranges, address_size, last in ((ranges4, 4, 2 ** 32 - 1), (ranges6, 16, 2 ** 128 - 1)):
+        table = bytearray()
+
+        for first, country, region, city, latitude, longitude in \
+                ranges + ([(last, '-', '-', '-', 0.0, 0.0)] if ranges else []):
+            table.extend(first.to_bytes(address_size, 'little'))
+            table.extend(struct.pack('<IIIff', string(country, country + ' long'),
+                                     string(region), string(city), latitude, longitude))
+
+        tables.append(table)
+
+    header = struct.pack('<5B4I', 5, columns, 20, 1, 1,
+                         len(ranges4), base4 + 1, len(ranges6), base6 + 1 if ranges6 else 0)
+    header += struct.pack('<II', 0, 0) + bytes([1, 0, 0])
+
+    with open(path, 'wb') as f:
+        f.write(header.ljust(header_size, b'\0'))
+        f.write(tables[0])
+        f.write(tables[1])
+        f.write(strings)
+
+
+def write_sample_database(path, ranges=1000, seed=1):
+    """
+    Write IP2Location DB5 file with given number of random IPv4 and IPv6
+    ranges located in :py:data:`LOCATIONS`; ``8.8.8.0/24`` is located in
+    Mountain View and ``147.229.0.0/16`` in Brno.
+
+    """
+
+    generator = random.Random(seed)
+    fixed = {0x08080800: LOCATIONS[1], 0x08080900: LOCATIONS[3],
+             0x93e50000: LOCATIONS[0], 0x93e60000: LOCATIONS[3]}
+    starts = set(generator.sample(range(1, 2 ** 32 - 1), ranges))
+    starts = {start for start in starts if not any(0 <= start - first < 2 ** 17 for first in fixed)}
+    ranges4 = [(0,) + LOCATIONS[3]]
+    ranges4 += [(start,) + fixed.get(start, generator.choice(LOCATIONS))
+                for start in sorted(starts | set(fixed))]
+    starts6 = sorted({generator.getrandbits(128) for _ in range(ranges)} - {0})
+    ranges6 = [(0,) + LOCATIONS[3]] + [(start,) + generator.choice(LOCATIONS) for start in starts6]
+
+    write_ip2location_db5(path, ranges4, ranges6)
+
+
+def write_maxmind_database(path):
+    """
+    Write GeoLite2 City database file locating ``8.8.8.0/24`` in Mountain
+    View and ``147.229.0.0/16`` in Brno. Requires :py:mod:`mmdb_writer`
+    (raises :py:exc:`ImportError` when it is not installed).
+
+    """
+
+    from mmdb_writer import MMDBWriter
+    from netaddr import IPSet
+
+    writer = MMDBWriter(ip_version=6, ipv4_compatible=True, database_type='GeoLite2-City')
+
+    for network, (country, region, city, latitude, longitude) in (('8.8.8.0/24', LOCATIONS[1]),
+                                                                  ('147.229.0.0/16', LOCATIONS[0])):
+        writer.insert_network(IPSet([network]), {
+            'country': {'iso_code': country},
+            'subdivisions': [{'names': {'en': region}}],
+            'city': {'names': {'en': city}},
+            'location': {'latitude': latitude, 'longitude': longitude},
+        })
+
+    writer.to_db_file(path)
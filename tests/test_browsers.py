@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of pool of browsers with fake WebDriver sessions.
+
+"""
+import threading
+import unittest
+
+from ip2geotools.databases.browsers import BrowserPool
+from ip2geotools.errors import LimitExceededError, ServiceError
+
+try:
+    import selenium
+    from selenium.common.exceptions import WebDriverException
+except ImportError:
+    selenium = None
+
+
+class FakeBrowser(object):
+    """
+    Fake WebDriver session showing result page of IP2Location demo with
+    given number of remaining queries.
+
+    """
+
+    def __init__(self, remaining=10, fail=False):
+        self.remaining = remaining
+        self.fail = fail
+        self.urls = []
+        self.quit_count = 0
+
+    def quit(self):
+        self.quit_count += 1
+
+    def get(self, url):
+        if self.fail:
+            raise WebDriverException('browser crashed')
+
+        self.urls.append(url)
+
+    def find_element(self, by=None, value=None):
+        return FakeElement('')
+
+    def find_element_by_tag_name(self, name):
+        return FakeElement('You still have %d/50 query limit' % self.remaining)
+
+    def find_element_by_xpath(self, xpath):
+        return FakeElement('')
+
+
+class FakeElement(object):
+
+    rows = {
+        'IP Address': '147.229.2.90',
+        'Region': 'Jihomoravsky kraj',
+        'City': 'Brno',
+        'Coordinates of City': '49.195060, 16.606837 (49°11\'42"N 16°36\'25"E)',
+    }
+
+    def __init__(self, text):
+        self.text = text
+
+    def find_element_by_xpath(self, xpath):
+        for name in sorted(self.rows, key=len, reverse=True):
+            if '"%s"' % name in xpath:
+                return FakeElement(self.rows[name])
+
+        raise AssertionError(xpath)
+
+    def find_element_by_class_name(self, name):
+        return self
+
+    def get_attribute(self, name):
+        return 'flag-icon flag-icon-cz'
+
+
+class BrowserPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def factory(self):
+        browser = FakeBrowser()
+        self.created.append(browser)
+
+        return browser
+
+    def test_browser_is_reused(self):
+        pool = BrowserPool(self.factory, max_uses=3)
+
+        for _ in range(4):
+            with pool.browser():
+                pass
+
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.created[0].quit_count, 1)
+        self.assertEqual(self.created[1].quit_count, 0)
+
+        pool.close()
+
+        self.assertEqual(self.created[1].quit_count, 1)
+
+    def test_browser_is_kept_after_discarded_errors_only(self):
+        pool = BrowserPool(self.factory, discard=lambda e: isinstance(e, ValueError))
+
+        with self.assertRaises(LimitExceededError):
+            with pool.browser():
+                raise LimitExceededError()
+
+        self.assertEqual(self.created[0].quit_count, 0)
+
+        with self.assertRaises(ValueError):
+            with pool.browser():
+                raise ValueError()
+
+        self.assertEqual(self.created[0].quit_count, 1)
+
+        with pool.browser() as browser:
+            self.assertIsNot(browser, self.created[0])
+
+        pool.close()
+
+    def test_close_quits_browsers_in_use(self):
+        pool = BrowserPool(self.factory, size=2)
+        checked_out = threading.Event()
+        closed = threading.Event()
+
+        def use():
+            with pool.browser():
+                checked_out.set()
+                closed.wait(5)
+
+        thread = threading.Thread(target=use)
+        thread.start()
+        checked_out.wait(5)
+        pool.close()
+
+        self.assertEqual(self.created[0].quit_count, 1)
+
+        closed.set()
+        thread.join()
+
+        self.assertEqual(self.created[0].quit_count, 1)
+
+        with pool.browser():
+            pass
+
+        self.assertEqual(self.created[1].quit_count, 1)
+
+    def test_size_is_bounded(self):
+        pool = BrowserPool(self.factory, size=2)
+        barrier = threading.Barrier(2)
+        used = []
+
+        def use():
+            with pool.browser() as browser:
+                used.append(browser)
+
+                try:
+                    barrier.wait(0.2)
+                except threading.BrokenBarrierError:
+                    pass
+
+        threads = [threading.Thread(target=use) for _ in range(6)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(used), 6)
+        self.assertLessEqual(len(self.created), 2)
+
+        pool.close()
+
+
+@unittest.skipIf(selenium is None, 'selenium is not installed')
+class Ip2LocationWebTest(unittest.TestCase):
+
+    def setUp(self):
+        from ip2geotools.databases.commercial import Ip2LocationWeb, _is_webdriver_error
+
+        self.browsers = [FakeBrowser(), FakeBrowser()]
+        self.database = Ip2LocationWeb
+        self.original = Ip2LocationWeb.browsers
+        Ip2LocationWeb.browsers = BrowserPool(lambda: self.browsers.pop(0), size=1,
+                                              discard=_is_webdriver_error)
+
+    def tearDown(self):
+        self.database.browsers.close()
+        self.database.browsers = self.original
+
+    def test_browser_is_replaced_after_webdriver_error_only(self):
+        browser = self.browsers[0]
+
+        ip_location = self.database.get('147.229.2.90')
+
+        self.assertEqual((ip_location.city, ip_location.country), ('Brno', 'CZ'))
+        self.assertEqual(ip_location.latitude, 49.19506)
+
+        browser.remaining = 0
+
+        with self.assertRaises(LimitExceededError):
+            self.database.get('147.229.2.90')
+
+        self.assertEqual(browser.quit_count, 0)
+
+        browser.fail = True
+
+        with self.assertRaises(ServiceError):
+            self.database.get('147.229.2.90')
+
+        self.assertEqual(browser.quit_count, 1)
+        self.assertEqual(len(self.browsers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of caching of locations.
+
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from ip2geotools.databases.cache import CachedDatabase, MemoryCache, SqliteCache
+from ip2geotools.databases.interfaces import IGeoIpDatabase
+from ip2geotools.models import IpLocation
+from ip2geotools.errors import IpAddressNotFoundError
+
+
+class _Database(IGeoIpDatabase):
+    # database locating IP addresses in city given by its options, except
+    # private ones, and recording IP addresses passed to get_many
+    name = '_database'
+    batches = []
+
+    @staticmethod
+    def get(ip_address, api_key=None, db_path=None, **kwargs):
+        if ip_address.startswith('10.'):
+            raise IpAddressNotFoundError(ip_address)
+
+        return IpLocation(ip_address, city=db_path or api_key)
+
+    @classmethod
+    def get_many(cls, ip_addresses, **kwargs):
+        ip_addresses = list(ip_addresses)
+        cls.batches.append(ip_addresses)
+
+        return super().get_many(ip_addresses, **kwargs)
+
+
+class CachedDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_options_are_part_of_key(self):
+        for cache in (MemoryCache(), SqliteCache(os.path.join(self.directory, 'cache.sqlite'))):
+            database = CachedDatabase(_Database, cache)
+
+            self.assertEqual(database.get('8.8.8.8', db_path='a.mmdb').city, 'a.mmdb')
+            self.assertEqual(database.get('8.8.8.8', db_path='b.mmdb').city, 'b.mmdb')
+            self.assertEqual(database.get('8.8.8.8', api_key='key1').city, 'key1')
+            self.assertEqual(database.get('8.8.8.8', api_key='key2').city, 'key2')
+            self.assertEqual(database.get('8.8.8.8', db_path='a.mmdb').city, 'a.mmdb')
+            self.assertEqual((database.hits, database.misses), (1, 4))
+
+    def test_api_key_is_not_stored(self):
+        database = CachedDatabase(_Database)
+        key = database._key('8.8.8.8', {'api_key': 'secret'})
+
+        self.assertNotIn('secret', key[0])
+
+    def test_get_many_passes_misses_to_database_at_once(self):
+        database = CachedDatabase(_Database)
+        database.get('8.8.8.8', db_path='a.mmdb')
+        _Database.batches = []
+        ip_addresses = ['1.1.1.1', '8.8.8.8', '10.0.0.1', '8.8.4.4', '1.1.1.1']
+
+        results = list(database.get_many(ip_addresses, db_path='a.mmdb'))
+
+        self.assertEqual([result.ip_address for result in results if isinstance(result, IpLocation)],
+                         ['1.1.1.1', '8.8.8.8', '8.8.4.4', '1.1.1.1'])
+        self.assertIsInstance(results[2], IpAddressNotFoundError)
+        self.assertEqual(_Database.batches, [['1.1.1.1', '10.0.0.1', '8.8.4.4', '1.1.1.1']])
+
+        results = list(database.get_many(ip_addresses, db_path='a.mmdb'))
+
+        self.assertIsInstance(results[2], IpAddressNotFoundError)
+        self.assertEqual(len(_Database.batches), 1)
+        self.assertEqual(len(database.get_batch(ip_addresses, db_path='a.mmdb')), 4)
+
+    def test_counters_are_thread_safe(self):
+        database = CachedDatabase(_Database)
+        database.get('8.8.8.8')
+
+        def lookup():
+            for _ in range(5000):
+                database.get('8.8.8.8')
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual((database.hits, database.misses), (40000, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the command line interface.
+
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from ip2geotools import cli
+from ip2geotools.errors import LocationError, IpAddressNotFoundError, ServiceError
+
+from tests.fixtures import write_sample_database
+
+
+INPUT = '8.8.8.8 - - [01/Jan/2018] "GET / HTTP/1.1"\njunk\n147.229.2.90\n\n::1\n'
+
+
+def run_cli(*arguments, **kwargs):
+    """
+    Run ``python -m ip2geotools`` with given arguments and input and return
+    its standard output.
+
+    """
+
+    return subprocess.run([sys.executable, '-m', 'ip2geotools'] + list(arguments),
+                          input=kwargs.get('input'),
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True,
+                          check=True).stdout
+
+
+class BulkLookupTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, 'IP2LOCATION-DB5.BIN')
+        write_sample_database(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def lookup(self, *arguments):
+        return run_cli('-d', 'localrangeindex', '--db_path', self.db_path, '-i', '-',
+                       *arguments, input=INPUT)
+
+    def test_inline_takes_one_line_per_ip_address(self):
+        for workers in ('1', '2'):
+            lines = self.lookup('-w', workers).splitlines()
+
+            self.assertEqual(len(lines), 4)
+            self.assertEqual(lines[0], '8.8.8.8, Mountain View, California, US, 37.386002, -122.083801')
+            self.assertEqual(lines[1], 'junk, InvalidRequestError')
+            self.assertTrue(lines[2].startswith('147.229.2.90, Brno'))
+            self.assertEqual(lines[3], '::1, IpAddressNotFoundError')
+
+    def test_malformed_ip_address_does_not_abort_lookup(self):
+        for workers in ('1', '2'):
+            lines = self.lookup('-w', workers, '-f', 'json').splitlines()
+
+            self.assertEqual(len(lines), 4)
+            self.assertIn('InvalidRequestError', lines[1])
+            self.assertIn('"city":"Brno"', lines[2].replace(' ', ''))
+
+    def test_errors_contain_ip_address(self):
+        for arguments in (('-f', 'json'), ('-f', 'csv-tab'), ('-f', 'xml'), ('-w', '2', '--unordered')):
+            output = self.lookup(*arguments)
+
+            self.assertIn('junk', output.replace('"junk"', 'junk'))
+            self.assertIn('::1', output)
+
+
+class SingleLookupTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, 'IP2LOCATION-DB5.BIN')
+        write_sample_database(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def lookup(self, *arguments):
+        return run_cli('-d', 'localrangeindex', '--db_path', self.db_path, *arguments).rstrip('\n')
+
+    def test_error_output_is_unchanged(self):
+        self.assertEqual(self.lookup('::1'), 'IpAddressNotFoundError: ::1')
+        self.assertEqual(self.lookup('::1', '-f', 'json'),
+                         '{"error_type":"IpAddressNotFoundError","error_message":"::1"}')
+        self.assertEqual(self.lookup('::1', '-f', 'csv-tab'), 'IpAddressNotFoundError\t::1')
+        self.assertEqual(self.lookup('::1', '-f', 'xml'),
+                         '<?xml version="1.0" encoding="UTF-8" ?><ip_location_error>'
+                         '<error_type>IpAddressNotFoundError</error_type>'
+                         '<error_message>::1</error_message></ip_location_error>')
+
+    def test_location_output_is_unchanged(self):
+        self.assertEqual(self.lookup('8.8.8.8').splitlines()[:4],
+                         ['8.8.8.8', 'Mountain View', 'California', 'US'])
+
+
+class _Database(object):
+    # database failing with unexpected error for some IP addresses
+    @staticmethod
+    def get_many(ip_addresses, **kwargs):
+        for ip_address in ip_addresses:
+            if ip_address == 'crash':
+                raise RuntimeError('worker crashed')
+
+            yield IpAddressNotFoundError() if ip_address == 'unknown' else ip_address
+
+
+class LookupParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        cli._databases[('_database', (), ())] = _Database
+
+    def tearDown(self):
+        del cli._databases[('_database', (), ())]
+
+    def test_failed_worker_does_not_abort_lookup(self):
+        results = list(cli.lookup_parallel('_database', ['a', 'crash', 'unknown', 'b'], {}, 2))
+
+        self.assertEqual(results[0], 'a')
+        self.assertIsInstance(results[1], ServiceError)
+        self.assertEqual(results[1].ip_address, 'crash')
+        self.assertIsInstance(results[2], IpAddressNotFoundError)
+        self.assertEqual(results[2].ip_address, 'unknown')
+        self.assertEqual(results[3], 'b')
+
+    def test_lookup_sets_ip_address_of_errors(self):
+        results = list(cli.lookup(_Database, ['a', 'unknown'], {}))
+
+        self.assertIsInstance(results[1], LocationError)
+        self.assertEqual(results[1].to_dict(), {'ip_address': 'unknown',
+                                                'error_type': 'IpAddressNotFoundError',
+                                                'error_message': ''})
+
+
+class DatabaseNamesTest(unittest.TestCase):
+
+    def test_all_databases_need_no_key(self):
+        self.assertEqual(cli.database_names('ALL').split(','), cli.KEYLESS_DATABASES)
+
+        for name in ('freegeoip', 'ip2locationweb', 'ipstack', 'maxmindgeolite2city'):
+            self.assertNotIn(name, cli.database_names('all').split(','))
+
+    def test_credentials_are_not_shared(self):
+        for arguments in (('-d', 'ipinfo,ipdata', '--api_key', 'key'),
+                          ('-d', 'maxmindgeolite2city,ip2location', '--db_path', 'db')):
+            with self.assertRaises(subprocess.CalledProcessError) as context:
+                run_cli('147.229.2.90', *arguments)
+
+            self.assertEqual(context.exception.returncode, 2)
+
+
+class OpenDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persistent_cache_keeps_locator_of_database(self):
+        from ip2geotools.databases.cache import SqliteCache
+        from ip2geotools.databases.noncommercial import DbIpCity
+
+        locator = DbIpCity.locator
+        gazetteer = locator.gazetteer = object()
+
+        try:
+            path = os.path.join(self.directory, 'cache.sqlite')
+            database = cli.open_database('dbipcity', {'path': path, 'ttl': 60}).database
+
+            self.assertIs(DbIpCity.locator, locator)
+            self.assertTrue(issubclass(database, DbIpCity))
+            self.assertIsInstance(database.locator.cache, SqliteCache)
+            self.assertIs(database.locator.gazetteer, gazetteer)
+        finally:
+            locator.gazetteer = None
+
+
+if __name__ == '__main__':
+    unittest.main()
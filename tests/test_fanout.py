@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of fan-out of lookups to several databases.
+
+"""
+import asyncio
+import concurrent.futures
+import subprocess
+import sys
+import time
+import unittest
+
+from ip2geotools.databases.fanout import FanOutDatabase, Provider, FASTEST, QUORUM
+from ip2geotools.models import IpLocation
+from ip2geotools.errors import IpAddressNotFoundError, InvalidResponseError, ServiceError, \
+                               LimitExceededError
+
+
+def database(name, delay=0.0, city='Brno', error=None):
+    """
+    Return database answering after given delay with location in given city
+    or with given error.
+
+    """
+
+    def get(ip_address, **kwargs):
+        time.sleep(delay)
+
+        if error is not None:
+            raise error
+
+        return IpLocation(ip_address, city=city, country='CZ')
+
+    async def aget(ip_address, **kwargs):
+        await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error
+
+        return IpLocation(ip_address, city=city, country='CZ')
+
+    return type(name, (object,), {'get': staticmethod(get), 'aget': staticmethod(aget)})
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class FanOutDatabaseTest(unittest.TestCase):
+
+    def lookup(self, providers, **kwargs):
+        fanout = FanOutDatabase(providers, **kwargs)
+
+        try:
+            return fanout.get('147.229.2.90')
+        finally:
+            fanout.close()
+
+    def test_fastest(self):
+        ip_location = self.lookup([database('Slow', 1.0, city='Praha'),
+                                   database('Failed', error=ServiceError()),
+                                   database('Fast', 0.05)], strategy=FASTEST)
+
+        self.assertEqual(ip_location.city, 'Brno')
+
+    def test_quorum(self):
+        ip_location = self.lookup([database('A', 0.05, city='brno'),
+                                   database('B', 0.1, city='Praha'),
+                                   database('C', 0.15, city='BRNO'),
+                                   database('D', 1.0, city='Praha')], strategy=QUORUM, quorum=2)
+
+        self.assertEqual(ip_location.city, 'brno')
+
+    def test_quorum_disagreement(self):
+        with self.assertRaises(InvalidResponseError):
+            self.lookup([database('A', city='Brno'), database('B', city='Praha'),
+                         database('C', error=LimitExceededError())], strategy=QUORUM)
+
+    def test_unreachable_quorum(self):
+        with self.assertRaises(LimitExceededError):
+            self.lookup([database('A', 1.0), database('B', error=LimitExceededError()),
+                         database('C', 0.05, error=ServiceError())], strategy=QUORUM)
+
+    def test_not_found(self):
+        with self.assertRaises(IpAddressNotFoundError):
+            self.lookup([database('A', error=IpAddressNotFoundError()),
+                         database('B', error=IpAddressNotFoundError())])
+
+    def test_deadline(self):
+        with self.assertRaises(ServiceError) as context:
+            self.lookup([database('A', 1.0), Provider(database('B', 2.0), timeout=0.1)],
+                        timeout=0.2)
+
+        self.assertEqual(str(context.exception), 'b did not respond in time')
+
+    def test_deadline_of_provider(self):
+        # location of A would be received first if its deadline was not kept
+        ip_location = self.lookup([Provider(database('A', 0.3, city='Praha'), timeout=0.1),
+                                   database('B', 0.6)], strategy=QUORUM, quorum=1)
+
+        self.assertEqual(ip_location.city, 'Brno')
+
+    def test_programming_error_is_raised(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.lookup([database('A', error=ZeroDivisionError()), database('B', 1.0)],
+                        strategy=QUORUM)
+
+    def test_exit_does_not_wait_for_running_requests(self):
+        script = ('import time\n'
+                  'from tests.test_fanout import database\n'
+                  'from ip2geotools.databases.fanout import FanOutDatabase, QUORUM\n'
+                  'fanout = FanOutDatabase([database("A", 0.1), database("B", 5.0)],\n'
+                  '                        strategy=QUORUM, quorum=1)\n'
+                  'print(fanout.get("147.229.2.90").city)\n')
+        # interpreter waiting for request of B would exceed timeout of subprocess
+        output = subprocess.run([sys.executable, '-c', script],
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True,
+                                check=True,
+                                timeout=3.0).stdout
+
+        self.assertEqual(output.strip(), 'Brno')
+
+    def test_aget(self):
+        fanout = FanOutDatabase([database('Slow', 1.0, city='Praha'), database('Fast', 0.05),
+                                 Provider(database('Late', 5.0), timeout=0.1)])
+
+        self.assertEqual(run(fanout.aget('147.229.2.90')).city, 'Brno')
+
+        with self.assertRaises(ServiceError) as context:
+            run(FanOutDatabase([database('Late', 5.0)], timeout=0.1).aget('147.229.2.90'))
+
+        self.assertEqual(str(context.exception), 'late did not respond in time')
+
+    def test_results_are_collected_in_order_of_completion(self):
+        fanout = FanOutDatabase([database('A'), database('B'), database('C')], strategy=FASTEST)
+        pending = [concurrent.futures.Future() for _ in fanout.providers]
+        results = []
+
+        for request, finished, city in zip(pending, (3.0, 1.0, 2.0), ('Praha', 'Brno', 'Ostrava')):
+            request.set_result((finished, IpLocation('147.229.2.90', city=city)))
+
+        fanout._collect(dict(zip(pending, fanout.providers)), pending, results, 0.0, 0.0, None)
+
+        self.assertEqual([result.city for result in results], ['Brno', 'Ostrava', 'Praha'])
+        self.assertEqual(pending, [])
+        self.assertEqual(fanout._decide('147.229.2.90', results, 0).city, 'Brno')
+
+    def test_abandoned_requests_do_not_block_pool(self):
+        fanout = FanOutDatabase([database('Slow', 1.0, city='Praha'), database('Fast', 0.05)],
+                                timeout=0.5, workers=2)
+
+        try:
+            # every lookup leaves slow request running in its thread
+            for _ in range(4):
+                self.assertEqual(fanout.get('147.229.2.90').city, 'Brno')
+        finally:
+            fanout.close()
+
+    def test_get_many(self):
+        results = list(FanOutDatabase([database('A', error=IpAddressNotFoundError()),
+                                       database('B')]).get_many(['147.229.2.90', '8.8.8.8']))
+
+        self.assertEqual([result.ip_address for result in results], ['147.229.2.90', '8.8.8.8'])
+
+
+if __name__ == '__main__':
+    unittest.main()
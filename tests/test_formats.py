@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of output data formats.
+
+"""
+import io
+import unittest
+
+from ip2geotools import formats
+from ip2geotools.models import IpLocation, IpLocationBatch
+from ip2geotools.errors import ServiceError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+LOCATIONS = [IpLocation('147.229.2.90', 'Brno', 'Jihomoravský kraj', 'CZ', 49.195, 16.608),
+             IpLocation('8.8.8.8', 'Mountain View', 'California', 'US', 37.386, -122.0838),
+             IpLocation('::1')]
+
+
+class _WithoutOrjson(object):
+    # context manager serializing JSON by json module only
+    def __enter__(self):
+        self.orjson = formats._get_orjson()
+        formats._orjson = None
+
+    def __exit__(self, *exc_info):
+        formats._orjson = self.orjson
+
+
+def _json_lines(values, binary=False):
+    file = io.BytesIO() if binary else io.StringIO()
+    formats.write_json_lines(values, file)
+
+    return file.getvalue().decode('utf-8') if binary else file.getvalue()
+
+
+class JsonTest(unittest.TestCase):
+
+    def setUp(self):
+        error = ServiceError()
+        error.ip_address = '10.0.0.1'
+        self.values = LOCATIONS + [error]
+
+    def test_output_is_compact(self):
+        self.assertEqual(LOCATIONS[0].to_json(),
+                         '{"ip_address":"147.229.2.90","city":"Brno","region":"Jihomoravský kraj",'
+                         '"country":"CZ","latitude":49.195,"longitude":16.608}')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_output_does_not_depend_on_orjson(self):
+        expected = [[value.to_json() for value in self.values],
+                    _json_lines(self.values), _json_lines(self.values, binary=True)]
+
+        with _WithoutOrjson():
+            actual = [[value.to_json() for value in self.values],
+                      _json_lines(self.values), _json_lines(self.values, binary=True)]
+
+        self.assertEqual(actual, expected)
+
+    def test_batch_output_equals_output_of_locations(self):
+        locations = LOCATIONS + [IpLocation('10.0.0.1', 'Null Island', None, 'XX', 0, 1e-05),
+                                 IpLocation('10.0.0.2', 'Brno', None, None, 49, -0.0)]
+        batch = IpLocationBatch(locations)
+
+        self.assertEqual(batch.to_json(), '\n'.join(value.to_json() for value in locations))
+
+        with _WithoutOrjson():
+            self.assertEqual(batch.to_json(), '\n'.join(value.to_json() for value in locations))
+
+        self.assertEqual(batch.to_csv(';'), '\n'.join(value.to_csv(';') for value in locations))
+
+
+class CsvTest(unittest.TestCase):
+
+    def test_rows_are_written_in_chunks(self):
+        locations = [LOCATIONS[i % 3] for i in range(2 * formats.CSV_BUFFER_ROWS + 1)]
+
+        for file in (io.StringIO(), io.BytesIO()):
+            self.assertEqual(formats.write_csv(locations, file, ';'), len(locations))
+
+            content = file.getvalue()
+
+            if isinstance(content, bytes):
+                content = content.decode('utf-8')
+
+            self.assertEqual(content, ''.join(value.to_csv(';') + '\n' for value in locations))
+
+    def test_header(self):
+        file = io.StringIO()
+
+        self.assertEqual(formats.write_csv(LOCATIONS[:1], file, header=True), 1)
+        self.assertEqual(file.getvalue().splitlines(),
+                         [','.join(IpLocation.__slots__), LOCATIONS[0].to_csv(',')])
+
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class MsgpackTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        error = ServiceError()
+        error.ip_address = '10.0.0.1'
+        file = io.BytesIO()
+
+        self.assertEqual(formats.write_msgpack(LOCATIONS + [error], file), 4)
+
+        file.seek(0)
+        values = list(formats.read_msgpack(file))
+
+        self.assertEqual([value.to_tuple() for value in values[:3]],
+                         [location.to_tuple() for location in LOCATIONS])
+        self.assertIsInstance(values[3], ServiceError)
+        self.assertEqual(values[3].to_dict(), error.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
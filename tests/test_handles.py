@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of registry of database handles.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from ip2geotools.databases.handles import HandleRegistry
+
+from tests.fixtures import write_maxmind_database
+
+try:
+    import geoip2.database
+    import mmdb_writer
+except ImportError:
+    geoip2 = None
+
+class _Handle(object):
+
+    def __init__(self, db_path):
+        with open(db_path) as f:
+            self.content = f.read()
+
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class HandleRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'database')
+        self.write('first')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, content):
+        # replace file as database updates do
+        path = self.db_path + '.tmp'
+
+        with open(path, 'w') as f:
+            f.write(content)
+
+        os.replace(path, self.db_path)
+
+    def test_handle_is_reused(self):
+        registry = HandleRegistry(_Handle)
+        handle = registry.get(self.db_path)
+
+        self.assertIs(registry.get(self.db_path), handle)
+
+        registry.close_all()
+
+        self.assertTrue(handle.closed)
+
+    def test_replaced_file_is_reopened(self):
+        registry = HandleRegistry(_Handle)
+        handle = registry.get(self.db_path)
+        self.write('second, longer')
+
+        self.assertEqual(registry.get(self.db_path).content, 'second, longer')
+        self.assertFalse(handle.closed)
+
+        registry.close_all()
+
+
+@unittest.skipIf(geoip2 is None, 'geoip2 and mmdb_writer are required')
+class MaxMindReaderTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, 'GeoLite2-City.mmdb')
+        write_maxmind_database(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_reader_is_reused(self):
+        from ip2geotools.databases.noncommercial import MaxMindGeoLite2City
+
+        self.assertEqual(MaxMindGeoLite2City.get('147.229.2.90', db_path=self.db_path).city, 'Brno')
+
+        reader = MaxMindGeoLite2City.readers.get(self.db_path)
+
+        self.assertEqual(MaxMindGeoLite2City.get('8.8.8.8', db_path=self.db_path).city,
+                         'Mountain View')
+        self.assertIs(MaxMindGeoLite2City.readers.get(self.db_path), reader)
+
+    def test_reader_uses_extension_when_installed(self):
+        from ip2geotools.databases.noncommercial import MaxMindGeoLite2City
+
+        try:
+            import maxminddb.extension
+        except ImportError:
+            self.skipTest('C extension of maxminddb is not installed')
+
+        self.assertIsInstance(MaxMindGeoLite2City.readers.get(self.db_path)._db_reader,
+                              maxminddb.extension.Reader)
+
+
+if __name__ == '__main__':
+    unittest.main()
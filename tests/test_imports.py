@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of modules loaded by importing the command line interface and the library.
+
+"""
+import subprocess
+import sys
+import unittest
+
+
+#: Modules which must not be loaded by importing the command line interface.
+HEAVY_MODULES = [
+    'selenium',
+    'lxml',
+    'pyquery',
+    'requests',
+    'aiohttp',
+    'geocoder',
+    'geoip2',
+    'maxminddb',
+    'IP2Location',
+    'numpy',
+    'orjson',
+    'msgpack',
+    'sqlite3',
+    'urllib.request',
+    'http.client',
+    'concurrent.futures',
+]
+
+
+def _run(code, *options):
+    return subprocess.run([sys.executable] + list(options) + ['-c', code],
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True,
+                          check=True)
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_cli_does_not_import_heavy_modules(self):
+        loaded = _run('import sys, ip2geotools.cli\n'
+                      'print(" ".join(sorted(sys.modules)))').stdout.split()
+
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    def test_databases_do_not_import_dependencies(self):
+        loaded = _run('import sys\n'
+                      'import ip2geotools.databases.noncommercial\n'
+                      'import ip2geotools.databases.commercial\n'
+                      'print(" ".join(sorted(sys.modules)))').stdout.split()
+
+        for module in ('selenium', 'lxml', 'pyquery', 'requests', 'aiohttp', 'geocoder',
+                       'geoip2', 'IP2Location', 'numpy'):
+            self.assertNotIn(module, loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of models.
+
+"""
+import array
+import collections
+import unittest
+
+from ip2geotools.models import IpLocation, IpLocationBatch
+from ip2geotools.errors import IpAddressNotFoundError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+CITIES = [('Brno', 'South Moravian', 'CZ', 49.195, 16.608),
+          ('Mountain View', 'California', 'US', 37.386, -122.0838),
+          ('Berlin', 'Berlin', 'DE', 52.52, 13.405)]
+
+
+class IpLocationTest(unittest.TestCase):
+
+    def test_to_dict_is_ordered(self):
+        ip_location = IpLocation('147.229.2.90', *CITIES[0])
+
+        self.assertIsInstance(ip_location.to_dict(), collections.OrderedDict)
+        self.assertEqual(list(ip_location.to_dict()), list(IpLocation.__slots__))
+        self.assertEqual(tuple(ip_location.to_dict().values()), ip_location.to_tuple())
+
+    def test_error_to_dict_is_ordered(self):
+        error = IpAddressNotFoundError('::1')
+        error.ip_address = '::1'
+
+        self.assertEqual(list(error.to_dict().items()), [('ip_address', '::1'),
+                                                         ('error_type', 'IpAddressNotFoundError'),
+                                                         ('error_message', '::1')])
+
+    def test_csv_and_xml_follow_slots(self):
+        ip_location = IpLocation('147.229.2.90', *CITIES[0])
+
+        self.assertEqual(ip_location.to_csv(','), '147.229.2.90,Brno,South Moravian,CZ,49.195,16.608')
+        self.assertLess(ip_location.to_xml().index('<ip_address>'), ip_location.to_xml().index('<city>'))
+        self.assertLess(ip_location.to_xml().index('<country>'), ip_location.to_xml().index('<latitude>'))
+
+    def test_attributes_are_slots(self):
+        ip_location = IpLocation('147.229.2.90', *CITIES[0])
+
+        self.assertFalse(hasattr(ip_location, '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            ip_location.postal_code = '60200'
+
+
+class IpLocationBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.locations = [IpLocation('147.229.2.90', *CITIES[0]),
+                          IpLocation('8.8.8.8', *CITIES[1]),
+                          IpLocation('::1'),
+                          IpLocation('10.0.0.1', 'Brno', None, 'CZ', 0, 1e-05)]
+        self.batch = IpLocationBatch(self.locations)
+
+    def test_indexing(self):
+        self.assertEqual(len(self.batch), 4)
+        self.assertEqual([ip_location.to_tuple() for ip_location in self.batch],
+                         [ip_location.to_tuple() for ip_location in self.locations])
+        self.assertEqual(self.batch[-1].to_tuple(), self.locations[-1].to_tuple())
+        self.assertIsInstance(self.batch[-1].latitude, int)
+
+        with self.assertRaises(IndexError):
+            self.batch[4]
+
+    def test_slicing(self):
+        batch = self.batch[1::2]
+
+        self.assertIsInstance(batch, IpLocationBatch)
+        self.assertEqual([ip_location.to_tuple() for ip_location in batch],
+                         [self.locations[1].to_tuple(), self.locations[3].to_tuple()])
+        self.assertEqual(batch.codes('city'), (array.array('i', [0, 1]), ['Mountain View', 'Brno']))
+
+    def test_column(self):
+        self.assertEqual(self.batch.column('ip_address'), ['147.229.2.90', '8.8.8.8', '::1', '10.0.0.1'])
+        self.assertEqual(self.batch.column('city'), ['Brno', 'Mountain View', None, 'Brno'])
+        self.assertEqual(self.batch.codes('city'), (array.array('i', [0, 1, -1, 0]),
+                                                    ['Brno', 'Mountain View']))
+        self.assertEqual(list(self.batch.column('latitude'))[:2], [49.195, 37.386])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_column(self):
+        latitude = self.batch.column('latitude')
+
+        self.assertIsInstance(latitude, numpy.ndarray)
+        self.assertFalse(latitude.flags.owndata)
+        self.assertTrue(numpy.isnan(latitude[2]))
+
+    def test_from_columns(self):
+        codes = {'city': array.array('i', [1, -1]), 'region': array.array('i', [-1, -1]),
+                 'country': array.array('i', [0, 0])}
+        categories = {'city': ['Brno', 'Praha'], 'region': [], 'country': ['CZ']}
+        latitude = array.array('d', [50.088, float('nan')])
+        batch = IpLocationBatch.from_columns(['10.0.0.1', '10.0.0.2'], codes, categories,
+                                             latitude, array.array('d', [14.421, 16.608]))
+
+        self.assertEqual([ip_location.to_tuple() for ip_location in batch],
+                         [('10.0.0.1', 'Praha', None, 'CZ', 50.088, 14.421),
+                          ('10.0.0.2', None, None, 'CZ', None, 16.608)])
+        self.assertIs(batch.codes('city')[0], codes['city'])
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_to_pandas(self):
+        data_frame = self.batch.to_pandas()
+
+        self.assertEqual(list(data_frame.columns), list(IpLocation.__slots__))
+        self.assertEqual(list(data_frame['city'].cat.categories), ['Brno', 'Mountain View'])
+        self.assertTrue(pandas.isna(data_frame['city'][2]))
+        self.assertEqual(list(data_frame['longitude'][:2]), [16.608, -122.0838])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        table = self.batch.to_arrow()
+
+        self.assertEqual(table.column_names, list(IpLocation.__slots__))
+        self.assertEqual(table.column('city').to_pylist(), ['Brno', 'Mountain View', None, 'Brno'])
+        self.assertEqual(table.column('latitude').to_pylist()[:2], [49.195, 37.386])
+
+if __name__ == '__main__':
+    unittest.main()
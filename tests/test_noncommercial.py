@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of noncommercial geolocation databases read from local files.
+
+"""
+import concurrent.futures
+import os
+import shutil
+import tempfile
+import unittest
+
+from ip2geotools.databases.noncommercial import MaxMindGeoLite2City, LocalRangeIndex, \
+                                              _Ip2LocationHandle
+from ip2geotools.databases.ranges import RangeIndex
+from ip2geotools.errors import InvalidRequestError, IpAddressNotFoundError
+
+from tests.fixtures import write_sample_database
+
+try:
+    import geoip2
+except ImportError:
+    geoip2 = None
+
+try:
+    import IP2Location
+except ImportError:
+    IP2Location = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _Reader(object):
+    # reader of GeoLite2 database rejecting every IP address as geoip2 does
+    def city(self, ip_address):
+        raise ValueError('%r does not appear to be an IPv4 or IPv6 address' % ip_address)
+
+
+class MaxMindGeoLite2CityTest(unittest.TestCase):
+
+    @unittest.skipIf(geoip2 is None, 'geoip2 is not installed')
+    def test_malformed_ip_address(self):
+        with self.assertRaises(InvalidRequestError) as context:
+            MaxMindGeoLite2City._lookup(_Reader(), 'junk')
+
+        self.assertEqual(str(context.exception), 'junk')
+
+
+@unittest.skipIf(IP2Location is None, 'IP2Location is not installed')
+class Ip2LocationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, 'IP2LOCATION-DB5.BIN')
+        write_sample_database(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_threads_do_not_share_mapping(self):
+        handle = _Ip2LocationHandle(self.db_path)
+
+        if handle._local is None:
+            self.skipTest('IP2Location library does not support memory mapping')
+
+        ip_addresses = ['147.229.2.90', '8.8.8.8'] * 500
+        expected = [handle.get_all(ip_address).city for ip_address in ip_addresses]
+        databases = set()
+
+        def lookup(ip_address):
+            result = handle.get_all(ip_address).city
+            databases.add(id(handle._local.database))
+
+            return result
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            actual = list(executor.map(lookup, ip_addresses))
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(expected[:2], ['Brno', 'Mountain View'])
+        self.assertGreater(len(databases), 1)
+
+        handle.close()
+
+
+class LocalRangeIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, 'IP2LOCATION-DB5.BIN')
+        write_sample_database(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_get(self):
+        ip_location = LocalRangeIndex.get('147.229.2.90', db_path=self.db_path)
+
+        self.assertEqual(ip_location.city, 'Brno')
+        self.assertEqual(ip_location.country, 'CZ')
+
+    def test_get_many(self):
+        results = list(LocalRangeIndex.get_many(['8.8.8.8', 'junk', '::1'], db_path=self.db_path))
+
+        self.assertEqual(results[0].city, 'Mountain View')
+        self.assertIsInstance(results[1], InvalidRequestError)
+        self.assertEqual(str(results[1]), 'junk')
+        self.assertIsInstance(results[2], IpAddressNotFoundError)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_get_arrays(self):
+        batch = LocalRangeIndex.get_arrays(numpy.array([0x93e5025a, 0x08080808, 0x08080908],
+                                                       dtype=numpy.uint32),
+                                           numpy.array([0], dtype=numpy.uint64),
+                                           numpy.array([0xffff93e5025a], dtype=numpy.uint64),
+                                           db_path=self.db_path)
+
+        self.assertEqual([ip_location.to_tuple() for ip_location in batch],
+                         [LocalRangeIndex.get('147.229.2.90', db_path=self.db_path).to_tuple(),
+                          LocalRangeIndex.get('8.8.8.8', db_path=self.db_path).to_tuple(),
+                          ('8.8.9.8', None, None, None, None, None),
+                          ('::ffff:147.229.2.90',) +
+                          LocalRangeIndex.get('147.229.2.90', db_path=self.db_path).to_tuple()[1:]])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_columns_wrap_packed_index(self):
+        index = RangeIndex.open(self.db_path).packed()
+        codes, categories, latitude, _ = index._columns()
+
+        self.assertFalse(codes['city'].flags.owndata)
+        self.assertFalse(latitude.flags.owndata)
+        self.assertEqual(categories['city'][codes['city'][index.row('147.229.2.90')]], 'Brno')
+
+
+if __name__ == '__main__':
+    unittest.main()
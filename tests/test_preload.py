@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of databases preloaded before processes are forked.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from ip2geotools import cli
+from ip2geotools.databases.noncommercial import LocalRangeIndex
+
+from tests.fixtures import write_sample_database
+
+
+class PreloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'IP2LOCATION-DB5.BIN')
+        write_sample_database(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_preloaded_index_is_packed_and_registered(self):
+        opened = LocalRangeIndex.indexes.get(self.db_path)
+        index = LocalRangeIndex.preload(self.db_path)
+
+        self.assertIsNot(index, opened)
+        self.assertIs(index.packed(), index)
+        self.assertIs(LocalRangeIndex.indexes.get(self.db_path), index)
+        self.assertIs(LocalRangeIndex.preload(self.db_path), index)
+        self.assertEqual(LocalRangeIndex.get('8.8.8.8', db_path=self.db_path).city, 'Mountain View')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork is required')
+    def test_forked_children_use_preloaded_index(self):
+        index = LocalRangeIndex.preload(self.db_path)
+        read, write = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            try:
+                os.write(write, ('%s %s' % (
+                    LocalRangeIndex.indexes.get(self.db_path) is index,
+                    LocalRangeIndex.get('8.8.8.8', db_path=self.db_path).city)).encode('utf-8'))
+            finally:
+                os._exit(0)
+
+        os.close(write)
+
+        with os.fdopen(read, 'rb') as f:
+            output = f.read().decode('utf-8')
+
+        os.waitpid(pid, 0)
+
+        self.assertEqual(output, 'True Mountain View')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork is required')
+    def test_command_line_workers_are_forked(self):
+        self.assertEqual(cli._fork_context()['mp_context'].get_start_method(), 'fork')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of parsing HTML pages of databases without an API on hand-written
+result pages modelled on the sites' markup.
+
+"""
+import os
+import unittest
+
+from ip2geotools.databases.scraping import parse_table
+
+try:
+    import pyquery
+except ImportError:
+    pyquery = None
+
+
+HTML_DIRECTORY = os.path.join(os.path.dirname(__file__), 'html')
+
+class Response(object):
+    """
+    Response with given content as returned by :py:mod:`requests`.
+
+    """
+
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+def read_html(name):
+    with open(os.path.join(HTML_DIRECTORY, name), 'rb') as f:
+        return f.read()
+
+
+def parse_with_selectors(content):
+    # parsing of DbIpWeb page by selector query per field, as done before parse_table
+    pq = pyquery.PyQuery(content.decode('utf-8'))
+
+    return [pq('html > body > div.container table tr:contains("%s") td' % label).text().strip()
+            for label in ('Country', 'State / Region', 'City', 'Coordinates')]
+
+
+def parse_with_table(content):
+    pq = pyquery.PyQuery(content.decode('utf-8'))
+    table = parse_table(*pq('html > body > div.container table'))
+
+    return [table.get(label, '') for label in ('Country', 'State / Region', 'City', 'Coordinates')]
+
+
+@unittest.skipIf(pyquery is None, 'pyquery is not installed')
+class ParseTableTest(unittest.TestCase):
+
+    def test_labels_are_matched_exactly(self):
+        table = parse_table(*pyquery.PyQuery(read_html('dbipweb.html').decode('utf-8'))('table'))
+
+        self.assertEqual(table['Country'], 'CZ')
+        self.assertEqual(table['City'], 'Brno')
+        self.assertEqual(table['Coordinates'], '49.1952, 16.608')
+        self.assertEqual(table['Country of capital'], 'Prague')
+
+    def test_dbipweb_response(self):
+        from ip2geotools.databases.commercial import DbIpWeb
+
+        ip_location = DbIpWeb._response('147.229.2.90', Response(read_html('dbipweb.html')))
+
+        self.assertEqual((ip_location.country, ip_location.region, ip_location.city),
+                         ('CZ', 'South Moravian', 'Brno'))
+        self.assertEqual((ip_location.latitude, ip_location.longitude), (49.1952, 16.608))
+
+    def test_neustarweb_response(self):
+        from ip2geotools.databases.commercial import NeustarWeb
+
+        ip_location = NeustarWeb._response('147.229.2.90', Response(read_html('neustarweb.html')))
+
+        self.assertEqual((ip_location.country, ip_location.region, ip_location.city),
+                         ('CZ', 'Jihomoravsky Kraj', 'Brno'))
+        self.assertEqual((ip_location.latitude, ip_location.longitude), (49.19522, 16.60796))
+
+    def test_labels_are_not_matched_as_substrings(self):
+        # selector query per field also matches rows whose labels contain the label
+        content = read_html('dbipweb.html')
+
+        self.assertEqual(parse_with_selectors(content),
+                         ['CZ Prague', 'South Moravian', 'Brno-City District Brno', '49.1952, 16.608'])
+        self.assertEqual(parse_with_table(content), ['CZ', 'South Moravian', 'Brno', '49.1952, 16.608'])
+
+
+if __name__ == '__main__':
+    unittest.main()